@@ -1,15 +1,28 @@
-from fastapi import FastAPI, UploadFile, File, Form
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-import cv2
-import numpy as np
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import asyncio
 import os
-import pytesseract
+import threading
 import json
-import re
-from spellchecker import SpellChecker
-from PIL import Image
-from inference_sdk import InferenceHTTPClient
+import time
+import requests
+from src.pipeline import BOX_MARGIN, crop_box, ocr_crop_timed, ocr_cache_key
+from src.batch import batch_jobs, merge_batches, ocr_canvas_timed
+from src.cache import content_hash, make_key, detection_cache, ocr_cache
+from src.detect import get_detector, get_roboflow_client, close_roboflow_client
+from src.tiling import DETECT_TILED, TiledDetector, shutdown_tile_pool
+from src.arrows import detect_arrows
+from src.graph import GRAPH_FORMATS, FlowGraph, export_graph
+from src.textfilter import OCR_PREFILTER, classify_crops, count_skipped, is_non_text
+from src.imaging import choose_reduction, decode_gray, scale_boxes, to_gray
+from src.sessions import documents
+from src.incremental import diff_boxes
+from src.pdf import PDF_DPI, clamp_dpi, page_count, render_page, spool_pdf, remove_spooled
+from src.jobs import JOB_MAX_BOXES, JOB_MAX_UPLOAD_MB, Job, QueueFull, jobs, run_image_job, run_pdf_job
+from src.metrics import BOXES, ERRORS, REQUEST_SECONDS, call_timed, record, registry
+from src.profiler import PROFILER_ENABLED, PROFILE_MAX_SECONDS, ProfilerBusy, sample_stacks
 
 app = FastAPI()
 
@@ -21,82 +34,605 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# prefer env var inside container, fallback to system binary
-pytesseract.pytesseract.tesseract_cmd = os.getenv("TESSERACT_CMD", "tesseract")
-spell = SpellChecker()
-
-def clean_and_correct(text):
-    text = re.sub(r'[^\x20-\x7E\n]', '', text)
-    text = re.sub(r'\s+', ' ', text)
-    text = re.sub(r'[^\w\s\n•\-•\*\.\,]', '', text)
-    corrected = []
-    for line in text.split('\n'):
-        words = line.split()
-        corrected_line = []
-        for word in words:
-            if word.isalpha():
-                corr = spell.correction(word)
-                corrected_line.append(corr if corr is not None else word)
-            else:
-                corrected_line.append(word)
-        corrected.append(' '.join(corrected_line))
-    return '\n'.join(corrected)
+# OCR runs off the event loop on a shared pool; each request may only occupy
+# OCR_REQUEST_CONCURRENCY slots of it so one huge diagram can't starve other callers
+OCR_EXECUTOR = os.getenv("OCR_EXECUTOR", "thread").lower()  # thread | process
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 1)))
+OCR_REQUEST_CONCURRENCY = int(os.getenv("OCR_REQUEST_CONCURRENCY", "4"))
+DETECTION_WORKERS = int(os.getenv("DETECTION_WORKERS", "4"))
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+
+def new_ocr_pool():
+    if OCR_EXECUTOR == "process":
+        return ProcessPoolExecutor(max_workers=OCR_WORKERS)
+    return ThreadPoolExecutor(max_workers=OCR_WORKERS, thread_name_prefix="ocr")
+
+POOL_FACTORIES = {
+    'ocr': new_ocr_pool,
+    # blocking detection HTTP calls get their own small pool so they never queue behind OCR
+    'detection': lambda: ThreadPoolExecutor(max_workers=DETECTION_WORKERS, thread_name_prefix="detect"),
+    'pdf': lambda: ThreadPoolExecutor(max_workers=PDF_RENDER_WORKERS, thread_name_prefix="pdf"),
+}
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(name):
+    # Created on first use, i.e. in each gunicorn worker after the fork, never in the
+    # preloading master: a ProcessPoolExecutor opens its call/result queues and wakeup
+    # pipe in __init__, and workers forked from one master would share them
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = _pools[name] = POOL_FACTORIES[name]()
+        return pool
+
+def shutdown_executors():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _pools.clear()
+
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", "unmatched")
+        REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+        if status >= 400:
+            ERRORS.inc(endpoint=endpoint, status=status)
+
+@registry.collector
+def service_metrics():
+    caches = {'detection': detection_cache.stats(), 'ocr': ocr_cache.stats()}
+    queue = jobs.stats()
+    docs = documents.stats()
+    return [
+        ('flowchart_cache_hits_total', 'counter', 'Result cache hits (memory or disk).',
+         [({'cache': name}, stats['hits']) for name, stats in caches.items()]),
+        ('flowchart_cache_disk_hits_total', 'counter', 'Result cache hits served from the disk tier.',
+         [({'cache': name}, stats['disk_hits']) for name, stats in caches.items()]),
+        ('flowchart_cache_misses_total', 'counter', 'Result cache misses.',
+         [({'cache': name}, stats['misses']) for name, stats in caches.items()]),
+        ('flowchart_cache_entries', 'gauge', 'Entries held in memory per result cache.',
+         [({'cache': name}, stats['entries']) for name, stats in caches.items()]),
+        ('flowchart_documents', 'gauge', 'Documents in the server-side store.', [({}, docs['documents'])]),
+        ('flowchart_document_bytes', 'gauge', 'Bytes held by the document store.', [({}, docs['bytes'])]),
+        ('flowchart_jobs_queued', 'gauge', 'Background jobs waiting for a worker.', [({}, queue['queued'])]),
+        ('flowchart_jobs_running', 'gauge', 'Background jobs being processed.', [({}, queue['running'])]),
+    ]
+
+def timings_payload(stage_times, start):
+    # per-box stages are summed over boxes, so they can exceed the wall-clock total
+    payload = {stage: round(seconds, 6) for stage, seconds in stage_times.items()}
+    payload['total'] = round(time.perf_counter() - start, 6)
+    return payload
+
+@app.on_event("startup")
+def create_clients():
+    # startup runs in the worker process, after any preload fork
+    for name in POOL_FACTORIES:
+        get_pool(name)
+    get_roboflow_client()
+
+@app.on_event("shutdown")
+def shutdown_pools():
+    shutdown_executors()
+    shutdown_tile_pool()
+    jobs.stop()
+    close_roboflow_client()
+
+async def run_ocr(img, boxes, batch=False, reduction=1, timings=None, skipped=None, on_result=None):
+    # on_result(i, text) is called on the event loop as soon as box i has its text
+    loop = asyncio.get_running_loop()
+    limit = asyncio.Semaphore(max(1, OCR_REQUEST_CONCURRENCY))
+
+    async def submit(fn, arg):
+        async with limit:
+            result, worker_timings = await loop.run_in_executor(get_pool('ocr'), fn, arg)
+        record(worker_timings, timings)
+        return result
+
+    def notify(i, text):
+        if on_result is not None:
+            on_result(i, text)
+
+    crops = [crop_box(img, box, reduction=reduction) for box in boxes]
+    texts = [''] * len(crops)
+    if OCR_PREFILTER and crops:
+        # crops without glyph-like ink inside the shape never reach Tesseract
+        kinds, filter_timings = await loop.run_in_executor(
+            None, call_timed, 'prefilter', classify_crops, crops, BOX_MARGIN // reduction)
+        record(filter_timings, timings)
+        count_skipped(kinds, skipped)
+        BOXES.inc(len(crops) - kinds.count('text'), source='skipped')
+        todo = [i for i, kind in enumerate(kinds) if kind == 'text']
+        for i, kind in enumerate(kinds):
+            if kind != 'text':
+                notify(i, '')
+    else:
+        todo = list(range(len(crops)))
+    todo_crops = [crops[i] for i in todo]
+    BOXES.inc(len(todo_crops), source='ocr')
+
+    async def ocr_one(i):
+        text = await submit(ocr_crop_timed, crops[i])
+        notify(i, text)
+        return text
+
+    async def ocr_canvas(indices, canvas_crops):
+        canvas_texts = await submit(ocr_canvas_timed, canvas_crops)
+        for j, text in zip(indices, canvas_texts):
+            notify(todo[j], text)
+        return canvas_texts
+
+    if batch and todo_crops:
+        # one Tesseract pass per stacked canvas instead of one per box
+        canvases = batch_jobs(todo_crops)
+        outputs = await asyncio.gather(*(ocr_canvas(indices, canvas_crops) for indices, canvas_crops in canvases))
+        fresh = merge_batches(len(todo_crops), canvases, outputs)
+    else:
+        # gather keeps results in input box order regardless of completion order
+        fresh = await asyncio.gather(*(ocr_one(i) for i in todo))
+    for i, text in zip(todo, fresh):
+        texts[i] = text
+    return texts
+
+async def cached_ocr(image_hash, boxes, load_image, batch=False, reduction=1, timings=None, skipped=None,
+                     on_result=None):
+    # Only boxes not seen before for this exact image/params are OCR'd again;
+    # load_image is only called (i.e. the image only decoded) when something missed.
+    # Connector boxes (by label) are answered without looking at pixels or the cache
+    non_text = {i for i, box in enumerate(boxes) if OCR_PREFILTER and is_non_text(box)}
+    count_skipped(['non_text'] * len(non_text), skipped)
+    BOXES.inc(len(non_text), source='skipped')
+    keys = [ocr_cache_key(image_hash, box, batch, reduction) for box in boxes]
+    loop = asyncio.get_running_loop()
+    lookup = [i for i in range(len(boxes)) if i not in non_text]
+    # the disk tier (RESULT_CACHE_DIR) reads files, so lookups stay off the event loop
+    cached = await loop.run_in_executor(None, ocr_cache.get_many, [keys[i] for i in lookup])
+    texts = [''] * len(boxes)
+    for i, text in zip(lookup, cached):
+        texts[i] = text
+    missing = [i for i, text in enumerate(texts) if text is None]
+    BOXES.inc(len(boxes) - len(non_text) - len(missing), source='cache')
+    if on_result is not None:
+        for i, text in enumerate(texts):
+            if text is not None:
+                on_result(i, text)
+    if missing:
+        img, decode_timings = await loop.run_in_executor(None, call_timed, 'decode', load_image)
+        record(decode_timings, timings)
+        fresh = await run_ocr(
+            img, [boxes[i] for i in missing], batch=batch, reduction=reduction, timings=timings, skipped=skipped,
+            on_result=None if on_result is None else lambda j, text: on_result(missing[j], text))
+        for i, text in zip(missing, fresh):
+            texts[i] = text
+        await loop.run_in_executor(None, ocr_cache.set_many, [(keys[i], texts[i]) for i in missing])
+    return [{'box': box, 'ocr_text': text} for box, text in zip(boxes, texts)]
+
+async def cached_detection(cache_key, detect, *args, stage='detect', timings=None):
+    loop = asyncio.get_running_loop()
+    boxes = await loop.run_in_executor(None, detection_cache.get, cache_key)
+    if boxes is None:
+        boxes, detect_timings = await loop.run_in_executor(get_pool('detection'), call_timed, stage, detect, *args)
+        record(detect_timings, timings)
+        await loop.run_in_executor(None, detection_cache.set, cache_key, boxes)
+    return boxes
+
+def resolve_detector(name):
+    try:
+        return get_detector(name)
+    except (ValueError, ImportError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+def detect_document(detector, doc):
+    # hosted detection takes the original bytes; local detectors reuse the decoded page
+    if detector.name == 'roboflow':
+        return detector.detect(doc.data)
+    return detector.detect_image(doc.image())
+
+def find_document_arrows(doc, boxes, reduction=1):
+    return detect_arrows(doc.image(reduction), scale_boxes(boxes, reduction))
+
+async def load_document(image, document_id):
+    # Either a fresh upload or a page uploaded earlier in this session
+    if document_id:
+        doc = documents.get(document_id)
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Unknown or expired document_id; upload the image again")
+        return doc
+    if image is None:
+        raise HTTPException(status_code=400, detail="Send an image or a document_id")
+    return documents.add(await image.read())
+
+async def ocr_document(doc, boxes, arrows, batch=False, find_arrows=False, previous=None, timings=None, skipped=None,
+                       on_result=None):
+    # Boxes that match a previous result within tolerance keep its text; only
+    # added or materially changed boxes go through (cached) OCR
+    reused, changed = diff_boxes(previous or [], boxes)
+    BOXES.inc(len(reused), source='reused')
+    if on_result is not None:
+        for i, text in reused.items():
+            on_result(i, text)
+    changed_boxes = [boxes[i] for i in changed]
+    reduction = choose_reduction(changed_boxes)
+    try:
+        fresh = await cached_ocr(
+            doc.hash, changed_boxes, lambda: doc.image(reduction), batch=batch, reduction=reduction,
+            timings=timings, skipped=skipped,
+            on_result=None if on_result is None else lambda j, text: on_result(changed[j], text))
+        texts = dict(reused)
+        texts.update((i, result['ocr_text']) for i, result in zip(changed, fresh))
+        results = [{'box': box, 'ocr_text': texts[i]} for i, box in enumerate(boxes)]
+        if find_arrows and not arrows:
+            loop = asyncio.get_running_loop()
+            arrows, arrow_timings = await loop.run_in_executor(
+                get_pool('detection'), call_timed, 'arrows', find_document_arrows, doc, boxes)
+            record(arrow_timings, timings)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    doc.boxes, doc.results, doc.arrows = boxes, results, arrows
+    return results, arrows, len(reused)
+
+def parse_ocr_form(doc, boxes, arrows, previous):
+    boxes = json.loads(boxes)
+    arrows = json.loads(arrows) if arrows else []
+    # previous results: sent by the client, or the last run on this document
+    previous = json.loads(previous) if previous else doc.results
+    if isinstance(previous, dict):
+        previous = previous.get('results', [])
+    return boxes, arrows, previous
 
 @app.post("/ocr")
 async def ocr_endpoint(
-    image: UploadFile = File(...),
+    image: UploadFile = File(None),
+    boxes: str = Form(...),
+    arrows: str = Form(None),
+    batch: bool = Form(False),
+    find_arrows: bool = Form(False),
+    document_id: str = Form(None),
+    previous: str = Form(None),
+    graph: bool = Form(False),
+    timings: bool = Form(False)
+):
+    start = time.perf_counter()
+    stage_times = {}
+    skipped = {'empty': 0, 'non_text': 0}
+    doc = await load_document(image, document_id)
+    boxes, arrows, previous = parse_ocr_form(doc, boxes, arrows, previous)
+    # the page is decoded once to grayscale and kept with the document; crops are views into it
+    results, arrows, reused = await ocr_document(
+        doc, boxes, arrows, batch=batch, find_arrows=find_arrows, previous=previous, timings=stage_times,
+        skipped=skipped)
+    content = {"document_id": doc.id, "results": results, "arrows": arrows, "reused": reused, "skipped": skipped}
+    if graph:
+        content["graph"] = FlowGraph(results, arrows).to_dict()
+    if timings:
+        content["timings"] = timings_payload(stage_times, start)
+    return JSONResponse(content=content)
+
+@app.post("/ocr/stream")
+async def ocr_stream_endpoint(
+    image: UploadFile = File(None),
     boxes: str = Form(...),
-    arrows: str = Form(None)
+    arrows: str = Form(None),
+    batch: bool = Form(False),
+    find_arrows: bool = Form(False),
+    document_id: str = Form(None),
+    previous: str = Form(None),
+    graph: bool = Form(False),
+    timings: bool = Form(False)
+):
+    # Same work as /ocr, as NDJSON: a "start" line, one "result" line per box as soon
+    # as its text is known (completion order, with its index), then "done" with the
+    # arrows and counts, or "error"
+    start = time.perf_counter()
+    stage_times = {}
+    skipped = {'empty': 0, 'non_text': 0}
+    doc = await load_document(image, document_id)
+    boxes, arrows, previous = parse_ocr_form(doc, boxes, arrows, previous)
+    queue = asyncio.Queue()
+
+    def on_result(i, text):
+        queue.put_nowait({"type": "result", "index": i, "box": boxes[i], "ocr_text": text})
+
+    async def run():
+        try:
+            results, found_arrows, reused = await ocr_document(
+                doc, boxes, arrows, batch=batch, find_arrows=find_arrows, previous=previous, timings=stage_times,
+                skipped=skipped, on_result=on_result)
+            done = {"type": "done", "document_id": doc.id, "arrows": found_arrows, "reused": reused,
+                    "skipped": skipped}
+            if graph:
+                done["graph"] = FlowGraph(results, found_arrows).to_dict()
+            if timings:
+                done["timings"] = timings_payload(stage_times, start)
+            queue.put_nowait(done)
+        except Exception as exc:
+            # the 200 and earlier lines are already sent; the error travels in the stream
+            status = exc.status_code if isinstance(exc, HTTPException) else 500
+            ERRORS.inc(endpoint='/ocr/stream', status=status)
+            queue.put_nowait({"type": "error", "status": status,
+                              "detail": exc.detail if isinstance(exc, HTTPException) else str(exc)})
+
+    async def lines():
+        task = asyncio.create_task(run())
+        try:
+            yield json.dumps({"type": "start", "document_id": doc.id, "total": len(boxes)}) + "\n"
+            while True:
+                item = await queue.get()
+                yield json.dumps(item) + "\n"
+                if item["type"] in ("done", "error"):
+                    break
+        finally:
+            # client went away: stop scheduling OCR for the remaining boxes
+            task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.post("/analyze")
+async def analyze_endpoint(
+    image: UploadFile = File(None),
+    document_id: str = Form(None),
+    detector: str = Form(None),
+    ocr: bool = Form(True),
+    batch: bool = Form(False),
+    find_arrows: bool = Form(True),
+    graph: bool = Form(False),
+    timings: bool = Form(False)
 ):
-    img = np.array(Image.open(image.file))
+    # detection + OCR + arrows for one upload; later edits reference document_id
+    start = time.perf_counter()
+    stage_times = {}
+    skipped = {'empty': 0, 'non_text': 0}
+    detector = resolve_detector(detector)
+    doc = await load_document(image, document_id)
+    cache_key = make_key('detection', detector.name, detector.model_id, doc.hash)
+    try:
+        boxes = await cached_detection(
+            cache_key, detect_document, detector, doc, stage=f"detect_{detector.name}", timings=stage_times)
+    except requests.RequestException as exc:
+        raise HTTPException(status_code=502, detail=f"Detection service error: {exc}")
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    results, arrows = [], []
+    if ocr:
+        results, arrows, _ = await ocr_document(
+            doc, boxes, [], batch=batch, find_arrows=find_arrows, timings=stage_times, skipped=skipped)
+    else:
+        doc.boxes = boxes
+    content = {"document_id": doc.id, "boxes": boxes, "results": results, "arrows": arrows, "skipped": skipped}
+    if graph:
+        content["graph"] = FlowGraph(results, arrows).to_dict()
+    if timings:
+        content["timings"] = timings_payload(stage_times, start)
+    return JSONResponse(content=content)
+
+@app.get("/documents/{document_id}")
+async def get_document(document_id: str):
+    doc = documents.get(document_id)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired document_id")
+    return doc.state()
+
+@app.get("/documents/{document_id}/graph")
+async def get_document_graph(document_id: str, format: str = 'json'):
+    # the document's last OCR results and arrows as a graph with stable node ids
+    doc = documents.get(document_id)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired document_id")
+    if format not in GRAPH_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(GRAPH_FORMATS)}")
+    body, media_type = export_graph(FlowGraph(doc.results or [], doc.arrows or []), format)
+    if isinstance(body, str):
+        return PlainTextResponse(body, media_type=media_type)
+    return JSONResponse(content=body)
+
+@app.delete("/documents/{document_id}")
+async def delete_document(document_id: str):
+    if not documents.remove(document_id):
+        raise HTTPException(status_code=404, detail="Unknown or expired document_id")
+    return {"deleted": document_id}
+
+@app.post("/arrows")
+async def arrows_endpoint(image: UploadFile = File(...), boxes: str = Form(...)):
+    try:
+        img = decode_gray(await image.read())
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     boxes = json.loads(boxes)
-    arrows = json.loads(arrows) if arrows else []
-    results = []
-    for box in boxes:
-        margin = 10
-        x1 = max(0, int(box['x1']) - margin)
-        y1 = max(0, int(box['y1']) - margin)
-        x2 = min(img.shape[1], int(box['x2']) + margin)
-        y2 = min(img.shape[0], int(box['y2']) + margin)
-        crop = img[y1:y2, x1:x2]
-        gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
-        sharpen = cv2.GaussianBlur(gray, (0, 0), 3)
-        sharpen = cv2.addWeighted(gray, 1.5, sharpen, -0.5, 0)
-        _, thresh = cv2.threshold(sharpen, 150, 255, cv2.THRESH_BINARY)
-        text = pytesseract.image_to_string(thresh, config='--oem 1 --psm 6', lang='eng').strip()
-        text = clean_and_correct(text)
-        results.append({'box': box, 'ocr_text': text})
-    return JSONResponse(content={"results": results, "arrows": arrows})
+    loop = asyncio.get_running_loop()
+    arrows = await loop.run_in_executor(get_pool('detection'), detect_arrows, img, boxes)
+    return JSONResponse(content={"arrows": arrows})
 
 @app.post("/cvmodel")
-async def cvmodel_endpoint(image: UploadFile = File(...)):
-    # Save uploaded image temporarily
-    temp_img_path = "temp_uploaded.png"
-    with open(temp_img_path, "wb") as f:
-        f.write(await image.read())
-
-    # Set up Roboflow inference client
-    CLIENT = InferenceHTTPClient(
-        api_url="https://serverless.roboflow.com",
-        api_key=os.getenv("ROBOFLOW_API_KEY")
-    )
-
-    # Run inference on the uploaded image
-    result = CLIENT.infer(
-        temp_img_path,
-        model_id="aiboardscannerdatasetcomplete-vvbe4/11"
-    )
-
-    # Convert Roboflow predictions to box format for frontend
-    boxes = []
-    for pred in result.get("predictions", []):
-        x1 = int(pred['x'] - pred['width'] / 2)
-        y1 = int(pred['y'] - pred['height'] / 2)
-        x2 = int(pred['x'] + pred['width'] / 2)
-        y2 = int(pred['y'] + pred['height'] / 2)
-        boxes.append({"x1": x1, "y1": y1, "x2": x2, "y2": y2, "label": "box"})
-
-    return JSONResponse(content={"boxes": boxes})
+async def cvmodel_endpoint(
+    image: UploadFile = File(...),
+    detector: str = Form(None),
+    tiled: bool = Form(DETECT_TILED),
+    timings: bool = Form(False)
+):
+    start = time.perf_counter()
+    stage_times = {}
+    detector = resolve_detector(detector)
+    if tiled:
+        # downscaled coarse pass plus overlapping full-resolution tiles for very large scans
+        detector = TiledDetector(detector)
+    data = await image.read()
+    cache_key = make_key('detection', detector.name, detector.model_id, content_hash(data))
+    # The upload bytes go straight to the detector; nothing touches disk
+    try:
+        boxes = await cached_detection(
+            cache_key, detector.detect, data, stage=f"detect_{detector.name}", timings=stage_times)
+    except requests.RequestException as exc:
+        raise HTTPException(status_code=502, detail=f"Detection service error: {exc}")
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    content = {"boxes": boxes}
+    if timings:
+        content["timings"] = timings_payload(stage_times, start)
+    return JSONResponse(content=content)
+
+@app.post("/pdf")
+async def pdf_endpoint(
+    file: UploadFile = File(...),
+    detector: str = Form(None),
+    dpi: int = Form(PDF_DPI),
+    batch: bool = Form(False)
+):
+    detector = resolve_detector(detector)
+    dpi = clamp_dpi(dpi)
+    data = await file.read()
+    pdf_hash = content_hash(data)
+    loop = asyncio.get_running_loop()
+    pdf_path = await loop.run_in_executor(get_pool('pdf'), spool_pdf, data)
+    del data
+    try:
+        pages = await loop.run_in_executor(get_pool('pdf'), page_count, pdf_path)
+    except ValueError as exc:
+        remove_spooled(pdf_path)
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    async def page_results():
+        # Page n+1 renders while page n is in detection/OCR; at most two pages live at once
+        pending = None
+        try:
+            pending = loop.run_in_executor(get_pool('pdf'), render_page, pdf_path, 1, dpi)
+            for page in range(1, pages + 1):
+                try:
+                    img = await pending
+                except Exception as exc:
+                    img = None
+                    error = f"Could not render page: {exc}"
+                pending = None
+                if page < pages:
+                    pending = loop.run_in_executor(get_pool('pdf'), render_page, pdf_path, page + 1, dpi)
+                if img is None:
+                    yield json.dumps({"page": page, "error": error}) + "\n"
+                    continue
+                page_hash = f"{pdf_hash}:{page}:{dpi}"
+                try:
+                    boxes = await cached_detection(
+                        make_key('detection', detector.name, detector.model_id, page_hash), detector.detect_image, img,
+                        stage=f"detect_{detector.name}")
+                    skipped = {'empty': 0, 'non_text': 0}
+                    results = await cached_ocr(page_hash, boxes, lambda: to_gray(img), batch=batch, skipped=skipped)
+                except (requests.RequestException, ValueError) as exc:
+                    yield json.dumps({"page": page, "error": str(exc)}) + "\n"
+                    continue
+                yield json.dumps({
+                    "page": page,
+                    "pages": pages,
+                    "width": img.shape[1],
+                    "height": img.shape[0],
+                    "results": results,
+                    "skipped": skipped,
+                }) + "\n"
+                del img
+        finally:
+            # On disconnect the next page may still be rendering from the spooled file:
+            # let it finish (and collect its error) before the file is removed
+            try:
+                if pending is not None:
+                    await asyncio.gather(pending, return_exceptions=True)
+            finally:
+                remove_spooled(pdf_path)
+
+    return StreamingResponse(page_results(), media_type="application/x-ndjson")
+
+@app.post("/jobs")
+async def create_job(
+    file: UploadFile = File(None),
+    document_id: str = Form(None),
+    boxes: str = Form(None),
+    detector: str = Form(None),
+    dpi: int = Form(PDF_DPI),
+    find_arrows: bool = Form(False),
+    priority: int = Form(10)
+):
+    # Big diagrams and multi-page PDFs: returns a job_id at once, poll GET /jobs/{job_id}
+    detector = resolve_detector(detector)
+    if document_id:
+        doc = await load_document(None, document_id)
+        data = doc.data
+        filename = ''
+    elif file is not None:
+        data = await file.read()
+        filename = (file.filename or '').lower()
+    else:
+        raise HTTPException(status_code=400, detail="Send a file or a document_id")
+    if len(data) > JOB_MAX_UPLOAD_MB * 1024 * 1024:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds JOB_MAX_UPLOAD_MB ({JOB_MAX_UPLOAD_MB})")
+    boxes = json.loads(boxes) if boxes else None
+    if boxes is not None and len(boxes) > JOB_MAX_BOXES:
+        raise HTTPException(status_code=413, detail=f"{len(boxes)} boxes exceeds JOB_MAX_BOXES ({JOB_MAX_BOXES})")
+
+    if data[:5] == b'%PDF-' or filename.endswith('.pdf'):
+        job = Job('pdf', priority)
+        pdf_hash = content_hash(data)
+        pdf_path = await asyncio.get_running_loop().run_in_executor(get_pool('pdf'), spool_pdf, data)
+        job.cleanup = lambda: remove_spooled(pdf_path)
+        fn, args = run_pdf_job, (pdf_path, pdf_hash, detector, clamp_dpi(dpi), find_arrows)
+    else:
+        job = Job('image', priority)
+        fn, args = run_image_job, (data, boxes, detector, find_arrows)
+    try:
+        jobs.submit(job, fn, *args)
+    except QueueFull as exc:
+        job.release()
+        raise HTTPException(status_code=503, detail=str(exc))
+    return JSONResponse(status_code=202, content=job.state(include_results=False))
+
+@app.get("/jobs")
+async def job_stats():
+    return jobs.stats()
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job_id")
+    return job.state()
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    job = jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job_id")
+    return job.state(include_results=False)
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {
+        "detection": detection_cache.stats(),
+        "ocr": ocr_cache.stats(),
+        "documents": documents.stats(),
+        "jobs": jobs.stats(),
+    }
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/profile")
+async def profile(seconds: float = 10.0, interval: float = 0.005):
+    # Samples every thread's stack for a while under real load; returns folded
+    # stacks for flamegraph.pl / speedscope. Off unless PROFILER_ENABLED=1
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler disabled; set PROFILER_ENABLED=1")
+    seconds = min(max(seconds, 0.1), PROFILE_MAX_SECONDS)
+    loop = asyncio.get_running_loop()
+    try:
+        folded = await loop.run_in_executor(None, sample_stacks, seconds, max(interval, 0.001))
+    except ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return PlainTextResponse(folded)
 
 @app.get("/health")
 async def health():
@@ -0,0 +1,60 @@
+# Accuracy/throughput of per-box OCR versus the batched single-canvas mode.
+# Run from the repo root:
+#   python -m benchmarks.bench_batch_ocr [--image page.png --boxes boxes.json] [--repeat 3]
+# If the boxes file carries "ocr_text" (e.g. a saved /ocr response) it is used as
+# ground truth; otherwise the per-box output is the reference for the batched one.
+import argparse
+import difflib
+import json
+import time
+import cv2
+from benchmarks.bench_ocr_backends import SAMPLE_LABELS, load_boxes, synthetic_crops
+from src.batch import ocr_batched
+from src.pipeline import crop_box, ocr_crop
+
+def similarity(a, b):
+    return difflib.SequenceMatcher(None, a.lower(), b.lower()).ratio()
+
+def load_truth(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    items = data.get('results', []) if isinstance(data, dict) else data
+    texts = [item.get('ocr_text') for item in items if isinstance(item, dict)]
+    return texts if texts and all(t is not None for t in texts) else None
+
+def timed(fn, crops, repeat):
+    best, texts = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        texts = fn(crops)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return texts, best
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-box and batched OCR")
+    parser.add_argument('--image')
+    parser.add_argument('--boxes', help="JSON list of boxes, a Roboflow predictions file or a saved /ocr response")
+    parser.add_argument('--count', type=int, default=40, help="synthetic boxes when no image is given")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.image:
+        img = cv2.imread(args.image)
+        crops = [crop_box(img, box) for box in load_boxes(args.boxes)]
+        truth = load_truth(args.boxes)
+    else:
+        crops = synthetic_crops(args.count)
+        truth = [SAMPLE_LABELS[i % len(SAMPLE_LABELS)] for i in range(args.count)]
+
+    per_box, per_box_time = timed(lambda cs: [ocr_crop(c) for c in cs], crops, args.repeat)
+    batched, batched_time = timed(ocr_batched, crops, args.repeat)
+    reference = truth or per_box
+
+    print(f"boxes: {len(crops)}  reference: {'ground truth' if truth else 'per-box output'}")
+    for name, texts, elapsed in (('per-box', per_box, per_box_time), ('batched', batched, batched_time)):
+        accuracy = sum(similarity(t, r) for t, r in zip(texts, reference)) / max(1, len(crops))
+        print(f"{name:8s} time={elapsed * 1000:.0f}ms  boxes/s={len(crops) / elapsed:.1f}  accuracy={accuracy:.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# Per-box OCR latency for each available backend.
+# Run from the repo root:
+#   python -m benchmarks.bench_ocr_backends [--image page.png --boxes boxes.json] [--repeat 3]
+# Without --image, small synthetic flowchart-style labels are rendered instead.
+import argparse
+import json
+import statistics
+import time
+import cv2
+import numpy as np
+from src.engine import PytesseractEngine, TesserocrEngine, tesserocr
+from src.pipeline import crop_box, preprocess
+
+SAMPLE_LABELS = ["Start", "End", "Yes", "No", "Process order", "Check stock", "Approve request", "Send invoice"]
+
+def synthetic_crops(count):
+    crops = []
+    for i in range(count):
+        text = SAMPLE_LABELS[i % len(SAMPLE_LABELS)]
+        crop = np.full((80, 260, 3), 255, dtype=np.uint8)
+        cv2.rectangle(crop, (4, 4), (255, 75), (0, 0, 0), 2)
+        cv2.putText(crop, text, (20, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 0), 2, cv2.LINE_AA)
+        crops.append(crop)
+    return crops
+
+def load_boxes(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict) and 'predictions' in data:
+        # Roboflow/vizedit format: centre + size
+        return [
+            {'x1': p['x'] - p['width'] / 2, 'y1': p['y'] - p['height'] / 2,
+             'x2': p['x'] + p['width'] / 2, 'y2': p['y'] + p['height'] / 2}
+            for p in data['predictions'] if not p.get('deleted')
+        ]
+    if isinstance(data, dict) and 'results' in data:
+        # saved /ocr response
+        return [item['box'] for item in data['results']]
+    return data.get('boxes', data) if isinstance(data, dict) else data
+
+def bench(engine, images, repeat):
+    start = time.perf_counter()
+    engine.image_to_string(images[0])
+    first = time.perf_counter() - start
+    samples = []
+    for _ in range(repeat):
+        for image in images:
+            start = time.perf_counter()
+            engine.image_to_string(image)
+            samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        'first_call_ms': first * 1000,
+        'mean_ms': statistics.mean(samples) * 1000,
+        'p50_ms': samples[len(samples) // 2] * 1000,
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+        'calls': len(samples),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-box latency of OCR backends")
+    parser.add_argument('--image')
+    parser.add_argument('--boxes', help="JSON list of {x1,y1,x2,y2} boxes, a Roboflow predictions file or a saved /ocr response")
+    parser.add_argument('--count', type=int, default=20, help="synthetic boxes when no image is given")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.image:
+        img = cv2.imread(args.image)
+        crops = [crop_box(img, box) for box in load_boxes(args.boxes)]
+    else:
+        crops = synthetic_crops(args.count)
+    images = [preprocess(crop) for crop in crops]
+
+    engines = [PytesseractEngine()]
+    if tesserocr is not None:
+        engines.append(TesserocrEngine())
+    else:
+        print("tesserocr not installed; only benchmarking pytesseract")
+
+    for engine in engines:
+        stats = bench(engine, images, args.repeat)
+        print(f"{engine.name:12s} " + "  ".join(
+            f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}" for k, v in stats.items()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,285 @@
+# End-to-end load benchmark on synthetic flowcharts with ground truth.
+# Run from the repo root:
+#   python -m benchmarks.bench_pipeline --mode inprocess --target ocr --concurrency 1,4,16
+#   python -m benchmarks.bench_pipeline --mode http --url http://127.0.0.1:8000 --target both --server-pid 1234
+# inprocess calls the FastAPI endpoint functions directly (no HTTP); http posts
+# multipart uploads to a running server. Result caches are disabled in-process
+# unless --warm; start a server with OCR_CACHE_SIZE=0 DETECTION_CACHE_SIZE=0 for
+# cold numbers over HTTP. --save writes the report as JSON, --baseline compares
+# against a saved report and exits 1 on a regression.
+import argparse
+import asyncio
+import difflib
+import importlib
+import json
+import math
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import requests
+from requests.adapters import HTTPAdapter
+from benchmarks.synth import FONTS, generate_flowchart
+
+COORDS = ('x1', 'y1', 'x2', 'y2')
+
+def similarity(a, b):
+    return difflib.SequenceMatcher(None, a.lower(), b.lower()).ratio()
+
+def percentile(samples, q):
+    if not samples:
+        return 0.0
+    # nearest-rank
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+def iou(a, b):
+    ix = max(0.0, min(a['x2'], b['x2']) - max(a['x1'], b['x1']))
+    iy = max(0.0, min(a['y2'], b['y2']) - max(a['y1'], b['y1']))
+    inter = ix * iy
+    union = (a['x2'] - a['x1']) * (a['y2'] - a['y1']) + (b['x2'] - b['x1']) * (b['y2'] - b['y1']) - inter
+    return inter / union if union > 0 else 0.0
+
+def detection_scores(predicted, truth, threshold=0.5):
+    # greedy one-to-one matching at IoU >= threshold; connectors are not shapes
+    predicted = [p for p in predicted if p.get('label') != 'arrow']
+    used, matched = set(), 0
+    for t in truth:
+        best, best_iou = None, threshold
+        for i, p in enumerate(predicted):
+            score = iou(p, t)
+            if i not in used and score >= best_iou:
+                best, best_iou = i, score
+        if best is not None:
+            used.add(best)
+            matched += 1
+    return matched, len(predicted), len(truth)
+
+def score(target, response, truth, find_arrows=False):
+    # accumulates into {'text': [...], 'matched', 'predicted', 'expected', 'edges_*'}
+    scores = {}
+    if target == 'ocr':
+        texts = [item['ocr_text'] for item in response.get('results', [])]
+        scores['text'] = [similarity(t, b['text']) for t, b in zip(texts, truth['boxes'])]
+        if find_arrows:
+            found = {(a['from'], a['to']) for a in response['arrows']}
+            expected = {(a['from'], a['to']) for a in truth['arrows']}
+            scores['edges_found'], scores['edges_correct'] = len(found), len(found & expected)
+            scores['edges_expected'] = len(expected)
+    else:
+        matched, predicted, expected = detection_scores(response.get('boxes', []), truth['boxes'])
+        scores.update(matched=matched, predicted=predicted, expected=expected)
+    return scores
+
+def make_pages(args):
+    pages = []
+    for i in range(args.pages):
+        img, truth = generate_flowchart(args.shapes, args.seed + i, args.dpi, args.noise, args.fonts.split(','))
+        _, png = cv2.imencode('.png', img)
+        pages.append((png.tobytes(), truth))
+    return pages
+
+def ocr_form(truth, args):
+    boxes = [{k: b[k] for k in COORDS} for b in truth['boxes']]
+    return {'boxes': json.dumps(boxes), 'batch': str(args.batch).lower(), 'find_arrows': str(args.find_arrows).lower()}
+
+def run_http(pages, target, concurrency, args):
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=concurrency))
+    url = args.url.rstrip('/')
+
+    def call(i):
+        data, truth = pages[i % len(pages)]
+        files = {'image': ('page.png', data, 'image/png')}
+        start = time.perf_counter()
+        try:
+            if target == 'ocr':
+                response = session.post(f"{url}/ocr", files=files, data=ocr_form(truth, args), timeout=600)
+            else:
+                response = session.post(f"{url}/cvmodel", files=files, data={'detector': args.detector}, timeout=600)
+        except requests.RequestException as exc:
+            print(f"request {i} failed: {exc}", file=sys.stderr)
+            return time.perf_counter() - start, None, truth
+        elapsed = time.perf_counter() - start
+        if response.status_code != 200:
+            print(f"request {i} failed: HTTP {response.status_code}", file=sys.stderr)
+            return elapsed, None, truth
+        return elapsed, response.json(), truth
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(call, range(args.requests)))
+    wall = time.perf_counter() - start
+    session.close()
+    return outcomes, wall
+
+def load_app(args):
+    if not args.warm:
+        # every request must do the full work, not hit a result from an earlier one
+        os.environ['OCR_CACHE_SIZE'] = '0'
+        os.environ['DETECTION_CACHE_SIZE'] = '0'
+        os.environ.pop('RESULT_CACHE_DIR', None)
+    return importlib.import_module('app')
+
+def run_inprocess(app, pages, target, concurrency, args):
+    async def call(i, limit):
+        data, truth = pages[i % len(pages)]
+        async with limit:
+            start = time.perf_counter()
+            doc = app.documents.add(data)
+            try:
+                if target == 'ocr':
+                    form = ocr_form(truth, args)
+                    response = await app.ocr_endpoint(
+                        image=None, boxes=form['boxes'], arrows=None, batch=args.batch,
+                        find_arrows=args.find_arrows, document_id=doc.id, previous='[]', graph=False, timings=False)
+                else:
+                    response = await app.analyze_endpoint(
+                        image=None, document_id=doc.id, detector=args.detector, ocr=False,
+                        batch=False, find_arrows=False, graph=False, timings=False)
+                body = json.loads(response.body)
+            except Exception as exc:
+                print(f"request {i} failed: {exc}", file=sys.stderr)
+                body = None
+            finally:
+                app.documents.remove(doc.id)
+            return time.perf_counter() - start, body, truth
+
+    async def run():
+        limit = asyncio.Semaphore(concurrency)
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(*(call(i, limit) for i in range(args.requests)))
+        return outcomes, time.perf_counter() - start
+
+    return asyncio.run(run())
+
+def peak_rss_mb(args):
+    if args.mode == 'http':
+        if not args.server_pid:
+            return None
+        try:
+            with open(f"/proc/{args.server_pid}/status", 'r') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            return None
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def summarize(target, concurrency, outcomes, wall, args):
+    latencies = [elapsed for elapsed, body, _ in outcomes if body is not None]
+    totals = {}
+    for _, body, truth in outcomes:
+        if body is None:
+            continue
+        for key, value in score(target, body, truth, args.find_arrows).items():
+            totals[key] = totals.get(key, []) + value if isinstance(value, list) else totals.get(key, 0) + value
+    row = {
+        'target': target,
+        'mode': args.mode,
+        'concurrency': concurrency,
+        'requests': len(outcomes),
+        'errors': len(outcomes) - len(latencies),
+        'throughput': len(latencies) / wall if wall else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'peak_rss_mb': peak_rss_mb(args),
+    }
+    if target == 'ocr':
+        texts = totals.get('text', [])
+        row['accuracy'] = sum(texts) / len(texts) if texts else 0.0
+        if 'edges_expected' in totals:
+            row['arrow_precision'] = totals['edges_correct'] / max(1, totals['edges_found'])
+            row['arrow_recall'] = totals['edges_correct'] / max(1, totals['edges_expected'])
+    else:
+        row['precision'] = totals.get('matched', 0) / max(1, totals.get('predicted', 0))
+        row['recall'] = totals.get('matched', 0) / max(1, totals.get('expected', 0))
+    return row
+
+def format_row(row):
+    parts = [f"{row['target']:6s} c={row['concurrency']:<3d} n={row['requests']} err={row['errors']}",
+             f"{row['throughput']:.2f} req/s",
+             f"p50={row['p50_ms']:.0f}ms p95={row['p95_ms']:.0f}ms p99={row['p99_ms']:.0f}ms"]
+    if row['peak_rss_mb'] is not None:
+        parts.append(f"rss={row['peak_rss_mb']:.0f}MB")
+    for key in ('accuracy', 'arrow_precision', 'arrow_recall', 'precision', 'recall'):
+        if key in row:
+            parts.append(f"{key}={row[key]:.3f}")
+    return '  '.join(parts)
+
+def regressions(rows, baseline, tolerance):
+    # slower p95, lower throughput or lower accuracy than the saved report by more than tolerance
+    previous = {(r['target'], r['concurrency']): r for r in baseline}
+    problems = []
+    for row in rows:
+        old = previous.get((row['target'], row['concurrency']))
+        if old is None:
+            continue
+        name = f"{row['target']} c={row['concurrency']}"
+        if row['p95_ms'] > old['p95_ms'] * (1 + tolerance):
+            problems.append(f"{name}: p95 {old['p95_ms']:.0f}ms -> {row['p95_ms']:.0f}ms")
+        if row['throughput'] < old['throughput'] * (1 - tolerance):
+            problems.append(f"{name}: throughput {old['throughput']:.2f} -> {row['throughput']:.2f} req/s")
+        for key in ('accuracy', 'precision', 'recall'):
+            if key in row and key in old and row[key] < old[key] - 0.02:
+                problems.append(f"{name}: {key} {old[key]:.3f} -> {row[key]:.3f}")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput, latency, memory and accuracy on synthetic flowcharts")
+    parser.add_argument('--mode', choices=('inprocess', 'http'), default='inprocess')
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--target', choices=('ocr', 'detect', 'both'), default='ocr')
+    parser.add_argument('--concurrency', default='1,4,16', help="comma-separated levels")
+    parser.add_argument('--requests', type=int, default=20, help="requests per concurrency level")
+    parser.add_argument('--pages', type=int, default=4, help="distinct synthetic pages")
+    parser.add_argument('--shapes', type=int, default=12)
+    parser.add_argument('--dpi', type=int, default=150)
+    parser.add_argument('--noise', type=float, default=0.0)
+    parser.add_argument('--fonts', default=','.join(FONTS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--detector', default='opencv')
+    parser.add_argument('--batch', action='store_true')
+    parser.add_argument('--find-arrows', action='store_true', help="also score arrow detection in /ocr")
+    parser.add_argument('--warm', action='store_true', help="keep result caches enabled (in-process)")
+    parser.add_argument('--server-pid', type=int, help="read the server's peak RSS from /proc (http mode)")
+    parser.add_argument('--save', help="write the report as JSON")
+    parser.add_argument('--baseline', help="earlier --save report to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.15, help="allowed relative latency/throughput regression")
+    args = parser.parse_args()
+
+    pages = make_pages(args)
+    targets = ('ocr', 'detect') if args.target == 'both' else (args.target,)
+    levels = [int(c) for c in args.concurrency.split(',') if c.strip()]
+    app = load_app(args) if args.mode == 'inprocess' else None
+    print(f"{args.mode}: {args.pages} pages x {args.shapes} shapes at {args.dpi} dpi, noise={args.noise}")
+
+    rows = []
+    for target in targets:
+        for concurrency in levels:
+            if app is None:
+                outcomes, wall = run_http(pages, target, concurrency, args)
+            else:
+                outcomes, wall = run_inprocess(app, pages, target, concurrency, args)
+            row = summarize(target, concurrency, outcomes, wall, args)
+            rows.append(row)
+            print(format_row(row))
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            problems = regressions(rows, json.load(f), args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# Accuracy and Tesseract calls of the legacy fixed-threshold preprocessing versus
+# the adaptive pipeline, on synthetic crops covering the usual failure cases.
+# Run from the repo root:
+#   python -m benchmarks.bench_preprocess [--count 8]
+import argparse
+import difflib
+import time
+import cv2
+import numpy as np
+from benchmarks.bench_ocr_backends import SAMPLE_LABELS
+from src.pipeline import ocr_crop_detailed
+from src.textproc import clean_and_correct
+
+def render(text, fill, ink, height=80, scale=0.9, gradient=False):
+    width = 300
+    crop = np.full((height, width, 3), fill, dtype=np.uint8)
+    if gradient:
+        ramp = np.linspace(0, 120, width, dtype=np.float32)
+        crop = np.clip(crop.astype(np.float32) - ramp[None, :, None], 0, 255).astype(np.uint8)
+    cv2.rectangle(crop, (2, 2), (width - 3, height - 3), (0, 0, 0), 2)
+    thickness = 2 if scale > 0.6 else 1
+    cv2.putText(crop, text, (14, int(height * 0.65)), cv2.FONT_HERSHEY_SIMPLEX, scale, (ink, ink, ink), thickness, cv2.LINE_AA)
+    return crop
+
+VARIANTS = {
+    'plain': dict(fill=255, ink=0),
+    'dark_fill': dict(fill=45, ink=255),
+    'low_contrast': dict(fill=205, ink=150),
+    'tiny': dict(fill=255, ink=0, height=26, scale=0.4),
+    'uneven_light': dict(fill=255, ink=0, gradient=True),
+}
+
+def similarity(a, b):
+    return difflib.SequenceMatcher(None, a.lower(), b.lower()).ratio()
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare legacy and adaptive OCR preprocessing")
+    parser.add_argument('--count', type=int, default=8, help="labels rendered per variant")
+    args = parser.parse_args()
+    labels = [SAMPLE_LABELS[i % len(SAMPLE_LABELS)] for i in range(args.count)]
+
+    totals = {}
+    for variant, params in VARIANTS.items():
+        crops = [render(label, **params) for label in labels]
+        line = [f"{variant:13s}"]
+        for mode in ('legacy', 'adaptive'):
+            start = time.perf_counter()
+            accuracy, calls = 0.0, 0
+            for crop, label in zip(crops, labels):
+                text, _, used = ocr_crop_detailed(crop, mode)
+                accuracy += similarity(clean_and_correct(text), label)
+                calls += used
+            elapsed = time.perf_counter() - start
+            accuracy /= len(crops)
+            acc, tot_calls, tot_time = totals.get(mode, (0.0, 0, 0.0))
+            totals[mode] = (acc + accuracy, tot_calls + calls, tot_time + elapsed)
+            line.append(f"{mode}: acc={accuracy:.2f} calls={calls} {elapsed * 1000:.0f}ms")
+        print("  ".join(line))
+
+    pages = len(VARIANTS)
+    for mode, (acc, calls, elapsed) in totals.items():
+        print(f"{mode:9s} mean accuracy={acc / pages:.3f}  Tesseract calls/page={calls / pages:.1f}  "
+              f"({args.count} boxes per page)  time/page={elapsed / pages * 1000:.0f}ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# Cold-start time and per-worker memory of the server, with and without preload.
+# Run from the repo root (Linux, needs gunicorn):
+#   python -m benchmarks.bench_startup --workers 4
+# Reports the import time / RSS of `import app` in a fresh interpreter, then for
+# each mode starts gunicorn, waits for /health and all workers, and reads RSS and
+# PSS (RSS with shared pages split between the processes sharing them) of the
+# master and each worker from /proc, before any OCR has run.
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+IMPORT_PROBE = (
+    "import json, resource, time; start = time.perf_counter(); import app; "
+    "print(json.dumps({'import_s': time.perf_counter() - start, "
+    "'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))"
+)
+
+def import_cost():
+    out = subprocess.run([sys.executable, '-c', IMPORT_PROBE], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def memory_mb(pid):
+    # (rss, pss) in MB from smaps_rollup
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", 'r') as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in ('Rss', 'Pss'):
+                    values[key] = int(rest.split()[0]) / 1024
+    except OSError:
+        pass
+    return values.get('Rss', 0.0), values.get('Pss', 0.0)
+
+def children(pid):
+    kids = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", 'r') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            kids.append(int(entry))
+    return kids
+
+def wait_ready(url, deadline):
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=2) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+def run_server(preload, workers, port, timeout):
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PRELOAD_APP='1' if preload else '0',
+               BIND=f"127.0.0.1:{port}")
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_ready(f"http://127.0.0.1:{port}/health", time.monotonic() + timeout):
+            raise RuntimeError("server did not become ready")
+        ready = time.perf_counter() - start
+        # workers finish booting independently; give the slowest a moment before measuring
+        deadline = time.monotonic() + timeout
+        while len(children(proc.pid)) < workers and time.monotonic() < deadline:
+            time.sleep(0.1)
+        time.sleep(1.0)
+        master = memory_mb(proc.pid)
+        kids = [memory_mb(pid) for pid in children(proc.pid)]
+        return {'ready_s': ready, 'master': master, 'workers': kids}
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time and per-worker RSS/PSS with and without preload")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args()
+
+    cost = import_cost()
+    print(f"import app: {cost['import_s']:.2f}s  peak RSS {cost['rss_mb']:.0f}MB")
+    for preload in (False, True):
+        result = run_server(preload, args.workers, args.port, args.timeout)
+        workers = result['workers']
+        rss = sum(r for r, _ in workers)
+        pss = sum(p for _, p in workers) + result['master'][1]
+        print(f"preload={'on ' if preload else 'off'} first response after {result['ready_s']:.2f}s  "
+              f"master RSS {result['master'][0]:.0f}MB  "
+              f"worker RSS {rss / max(1, len(workers)):.0f}MB each  total PSS {pss:.0f}MB ({len(workers)} workers)")
+
+if __name__ == '__main__':
+    main()
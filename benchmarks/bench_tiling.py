@@ -0,0 +1,99 @@
+# Single-shot vs tiled detection on large synthetic scans.
+# Run from the repo root:
+#   python -m benchmarks.bench_tiling --shapes 400 --dpi 150 --detector opencv
+#   ROBOFLOW_API_KEY=... python -m benchmarks.bench_tiling --detector roboflow --repeat 1
+# Both modes see the same encoded page. Bytes uploaded are what a hosted detector
+# would receive (the upload itself single-shot; the downscaled copy plus one JPEG
+# per non-empty tile when tiled), counted for local detectors too. Recall and
+# precision are greedy IoU >= 0.5 matches against the generator's ground truth.
+# Tile size, overlap and concurrency come from the DETECT_* environment variables.
+import argparse
+import threading
+import time
+import cv2
+from benchmarks.bench_pipeline import detection_scores, percentile
+from benchmarks.synth import generate_flowchart
+from src.detect import get_detector
+from src.tiling import TiledDetector
+
+class MeteredDetector:
+    # Counts the bytes and calls that reach the wrapped detector
+    def __init__(self, detector, quality=90):
+        self.detector = detector
+        self.name = detector.name
+        self.model_id = detector.model_id
+        self.quality = quality
+        self.bytes = 0
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def detect(self, image_bytes):
+        with self.lock:
+            self.bytes += len(image_bytes)
+            self.calls += 1
+        return self.detector.detect(image_bytes)
+
+    def detect_image(self, img):
+        # encoded the way RoboflowDetector.detect_image uploads decoded pages
+        ok, buf = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise ValueError("Could not encode image")
+        return self.detect(buf.tobytes())
+
+    def reset(self):
+        self.bytes = self.calls = 0
+
+def run(detector, data, truth, repeat):
+    latencies, boxes = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        boxes = detector.detect(data)
+        latencies.append(time.perf_counter() - start)
+    matched, predicted, expected = detection_scores(boxes, truth['boxes'])
+    return {
+        'latency': latencies,
+        'matched': matched, 'predicted': predicted, 'expected': expected,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes uploaded, latency and recall: single-shot vs tiled detection")
+    parser.add_argument('--detector', default='opencv')
+    parser.add_argument('--pages', type=int, default=2)
+    parser.add_argument('--shapes', type=int, default=400)
+    parser.add_argument('--dpi', type=int, default=150)
+    parser.add_argument('--noise', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--format', choices=('png', 'jpg'), default='png', help="encoding of the uploaded page")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per page and mode")
+    args = parser.parse_args()
+
+    metered = MeteredDetector(get_detector(args.detector))
+    modes = {'single': metered, 'tiled': TiledDetector(metered)}
+    totals = {mode: {'bytes': 0, 'calls': 0, 'latency': [], 'matched': 0, 'predicted': 0, 'expected': 0}
+              for mode in modes}
+    for i in range(args.pages):
+        img, truth = generate_flowchart(args.shapes, args.seed + i, args.dpi, args.noise)
+        _, buf = cv2.imencode('.' + args.format, img)
+        data = buf.tobytes()
+        print(f"page {i}: {img.shape[1]}x{img.shape[0]} px, {len(truth['boxes'])} shapes, "
+              f"{len(data) / 1e6:.1f}MB {args.format}")
+        for mode, detector in modes.items():
+            metered.reset()
+            result = run(detector, data, truth, args.repeat)
+            total = totals[mode]
+            total['bytes'] += metered.bytes / args.repeat
+            total['calls'] += metered.calls / args.repeat
+            total['latency'].extend(result['latency'])
+            for key in ('matched', 'predicted', 'expected'):
+                total[key] += result[key]
+
+    print(f"{'mode':<8}{'MB up':>9}{'calls':>8}{'p50 s':>9}{'p95 s':>9}{'recall':>9}{'precision':>11}")
+    for mode, total in totals.items():
+        recall = total['matched'] / total['expected'] if total['expected'] else 0.0
+        precision = total['matched'] / total['predicted'] if total['predicted'] else 0.0
+        print(f"{mode:<8}{total['bytes'] / args.pages / 1e6:>9.2f}{total['calls'] / args.pages:>8.1f}"
+              f"{percentile(total['latency'], 0.5):>9.2f}{percentile(total['latency'], 0.95):>9.2f}"
+              f"{recall:>9.3f}{precision:>11.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# Local stand-in for the Roboflow serverless endpoint, for exercising /cvmodel offline.
+#   python -m benchmarks.mock_roboflow --port 9001 --latency 0.2 --fail-rate 0.1
+#   ROBOFLOW_API_URL=http://127.0.0.1:9001 uvicorn app:app
+# Responds to POST /<project>/<version> with a fixed grid of predictions and
+# reports how many requests and connections it has seen, so pooling/retries can be checked.
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+stats = {'requests': 0, 'connections': 0, 'failures': 0}
+stats_lock = threading.Lock()
+
+def fake_predictions(count=6):
+    preds = []
+    for i in range(count):
+        preds.append({
+            'x': 150 + (i % 3) * 250, 'y': 100 + (i // 3) * 200,
+            'width': 180, 'height': 90, 'class': 'process', 'confidence': 0.9,
+        })
+    return preds
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so reused connections are visible
+    latency = 0.0
+    fail_rate = 0.0
+
+    def setup(self):
+        super().setup()
+        with stats_lock:
+            stats['connections'] += 1
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        with stats_lock:
+            self._send_json(200, dict(stats))
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = self.rfile.read(length)
+        with stats_lock:
+            stats['requests'] += 1
+        time.sleep(self.latency)
+        if random.random() < self.fail_rate:
+            with stats_lock:
+                stats['failures'] += 1
+            self._send_json(503, {'message': 'simulated failure'})
+            return
+        try:
+            size = len(base64.b64decode(payload))
+        except ValueError:
+            self._send_json(400, {'message': 'body must be base64'})
+            return
+        self._send_json(200, {'predictions': fake_predictions(), 'image': {'bytes': size}})
+
+    def log_message(self, format, *args):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Roboflow inference server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9001)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+    Handler.latency = args.latency
+    Handler.fail_rate = args.fail_rate
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"Mock Roboflow listening on http://{args.host}:{args.port} (GET / for stats)")
+    server.serve_forever()
+
+if __name__ == '__main__':
+    main()
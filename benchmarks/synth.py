@@ -0,0 +1,150 @@
+# Synthetic flowcharts with ground truth, for benchmarks and accuracy checks.
+# Run from the repo root:
+#   python -m benchmarks.synth --out bench_data --pages 5 --shapes 20 --dpi 150 --noise 0.2
+# Writes page_NNN.png plus page_NNN.json ({"boxes": [{x1, y1, x2, y2, label, text}],
+# "arrows": [{from, to}]}); the JSON also works as --boxes for the other benchmarks.
+import argparse
+import json
+import math
+import os
+import random
+import cv2
+import numpy as np
+
+SHAPES = ('rectangle', 'diamond', 'oval')
+FONTS = {
+    'simplex': cv2.FONT_HERSHEY_SIMPLEX,
+    'duplex': cv2.FONT_HERSHEY_DUPLEX,
+    'complex': cv2.FONT_HERSHEY_COMPLEX,
+    'triplex': cv2.FONT_HERSHEY_TRIPLEX,
+}
+WORDS = {
+    'rectangle': ["Process order", "Check stock", "Send invoice", "Update record", "Notify customer",
+                  "Create account", "Ship items", "Review form", "Load data", "Archive file"],
+    'diamond': ["Approved", "In stock", "Valid", "Paid", "Complete", "Retry"],
+    'oval': ["Start", "End", "Begin", "Finish", "Stop"],
+}
+BASE_DPI = 100.0  # layout sizes below are in pixels at this resolution
+
+def snake_position(i, cols):
+    # consecutive shapes are always neighbours: rows alternate left-to-right / right-to-left
+    row, col = divmod(i, cols)
+    return row, (col if row % 2 == 0 else cols - 1 - col)
+
+def fit_text(text, font, max_width, scale, thickness):
+    while scale > 0.2:
+        (w, h), base = cv2.getTextSize(text, font, scale, thickness)
+        if w <= max_width:
+            return scale, w, h
+        scale *= 0.9
+    (w, h), _ = cv2.getTextSize(text, font, scale, thickness)
+    return scale, w, h
+
+def draw_shape(img, kind, x1, y1, x2, y2, thickness):
+    cx, cy = (x1 + x2) // 2, (y1 + y2) // 2
+    if kind == 'rectangle':
+        cv2.rectangle(img, (x1, y1), (x2, y2), 0, thickness)
+    elif kind == 'diamond':
+        points = np.array([(cx, y1), (x2, cy), (cx, y2), (x1, cy)], np.int32)
+        cv2.polylines(img, [points], True, 0, thickness, cv2.LINE_AA)
+    else:
+        cv2.ellipse(img, (cx, cy), ((x2 - x1) // 2, (y2 - y1) // 2), 0, 0, 360, 0, thickness, cv2.LINE_AA)
+
+def connect(a, b):
+    # straight connector between the facing sides of two neighbouring shapes
+    acx, acy = (a['x1'] + a['x2']) // 2, (a['y1'] + a['y2']) // 2
+    bcx, bcy = (b['x1'] + b['x2']) // 2, (b['y1'] + b['y2']) // 2
+    if abs(acy - bcy) < abs(acx - bcx):
+        y = (acy + bcy) // 2
+        return ((a['x2'], y), (b['x1'], y)) if bcx > acx else ((a['x1'], y), (b['x2'], y))
+    x = (acx + bcx) // 2
+    return ((x, a['y2']), (x, b['y1'])) if bcy > acy else ((x, a['y1']), (x, b['y2']))
+
+def add_noise(img, amount, rng):
+    if amount <= 0:
+        return img
+    nprng = np.random.default_rng(rng.randrange(2 ** 32))
+    noisy = img.astype(np.float32) + nprng.normal(0, 25 * amount, img.shape)
+    speckle = nprng.random(img.shape) < 0.01 * amount
+    noisy[speckle] = nprng.choice([0, 255], size=int(speckle.sum()))
+    noisy = np.clip(noisy, 0, 255).astype(np.uint8)
+    if amount >= 0.5:
+        noisy = cv2.GaussianBlur(noisy, (3, 3), 0)  # scanned look
+    return noisy
+
+def generate_flowchart(shapes=12, seed=0, dpi=150, noise=0.0, fonts=None, extra_arrows=0.2):
+    # Returns (grayscale page, ground truth dict)
+    rng = random.Random(seed)
+    fonts = fonts or list(FONTS)
+    s = dpi / BASE_DPI
+    cols = max(1, math.ceil(math.sqrt(shapes)))
+    rows = math.ceil(shapes / cols)
+    cell_w, cell_h = int(280 * s), int(190 * s)
+    margin = int(40 * s)
+    img = np.full((rows * cell_h + 2 * margin, cols * cell_w + 2 * margin), 255, np.uint8)
+    thickness = max(1, round(2 * s))
+
+    boxes, cells = [], {}
+    for i in range(shapes):
+        row, col = snake_position(i, cols)
+        kind = 'oval' if i in (0, shapes - 1) else rng.choice(SHAPES[:2])
+        w = int(rng.uniform(200, 230) * s) if kind == 'diamond' else int(rng.uniform(160, 200) * s)
+        h = int(rng.uniform(100, 120) * s) if kind == 'diamond' else int(rng.uniform(65, 85) * s)
+        cx = margin + col * cell_w + cell_w // 2
+        cy = margin + row * cell_h + cell_h // 2
+        x1, y1, x2, y2 = cx - w // 2, cy - h // 2, cx + w // 2, cy + h // 2
+        draw_shape(img, kind, x1, y1, x2, y2, thickness)
+
+        text = rng.choice(WORDS[kind])
+        font = FONTS[rng.choice(fonts)]
+        inner = w * (0.5 if kind == 'diamond' else 0.75 if kind == 'oval' else 0.85)
+        scale, tw, th = fit_text(text, font, inner, 0.75 * s, thickness)
+        cv2.putText(img, text, (cx - tw // 2, cy + th // 2), font, scale, 0, thickness, cv2.LINE_AA)
+        boxes.append({"x1": x1, "y1": y1, "x2": x2, "y2": y2, "label": kind, "text": text})
+        cells[(row, col)] = i
+
+    edges = [(i, i + 1) for i in range(shapes - 1)]
+    for i in range(shapes):
+        row, col = snake_position(i, cols)
+        below = cells.get((row + 1, col))
+        if below is not None and below != i + 1 and rng.random() < extra_arrows:
+            edges.append((i, below))
+    for a, b in edges:
+        start, end = connect(boxes[a], boxes[b])
+        length = max(1.0, math.hypot(end[0] - start[0], end[1] - start[1]))
+        cv2.arrowedLine(img, start, end, 0, thickness, cv2.LINE_AA, tipLength=min(0.5, 12 * s / length))
+
+    img = add_noise(img, noise, rng)
+    truth = {
+        "width": img.shape[1],
+        "height": img.shape[0],
+        "dpi": dpi,
+        "seed": seed,
+        "noise": noise,
+        "boxes": boxes,
+        "arrows": [{"from": a, "to": b} for a, b in edges],
+    }
+    return img, truth
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic flowcharts with ground truth")
+    parser.add_argument('--out', default='bench_data')
+    parser.add_argument('--pages', type=int, default=5)
+    parser.add_argument('--shapes', type=int, default=12)
+    parser.add_argument('--dpi', type=int, default=150)
+    parser.add_argument('--noise', type=float, default=0.0, help="0 = clean, 1 = heavy scan noise")
+    parser.add_argument('--fonts', default=','.join(FONTS), help="comma-separated: " + ', '.join(FONTS))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for page in range(args.pages):
+        img, truth = generate_flowchart(args.shapes, args.seed + page, args.dpi, args.noise, args.fonts.split(','))
+        base = os.path.join(args.out, f"page_{page + 1:03d}")
+        cv2.imwrite(base + '.png', img)
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump(truth, f, indent=2)
+    print(f"wrote {args.pages} pages to {args.out}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+# Production serving: one gunicorn master, WEB_CONCURRENCY uvicorn worker processes.
+#   gunicorn -c gunicorn.conf.py app:app
+# With preload the master imports app once (OpenCV, NumPy, the spell-check word
+# frequency dictionary, compiled regexes) and the workers share those pages
+# copy-on-write. Tesseract handles, the OCR/detection/PDF executors (including
+# the OCR_EXECUTOR=process pool, whose queues and pipes must not be shared),
+# HTTP sessions and background job threads are all created inside each worker
+# after the fork, in the startup handler or on first use.
+import gc
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+# Documents and jobs live in the worker that created them, so a document_id or
+# job_id is only found on the same worker; raise this behind a sticky proxy
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("PRELOAD_APP", "1").lower() in ("1", "true", "yes")
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+# recycle workers after this many requests (0 = never)
+max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+# proxies whose X-Forwarded-* headers are trusted (uvicorn's own default)
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+def when_ready(server):
+    if preload_app:
+        # Move everything the preloaded app allocated into a permanent GC generation;
+        # otherwise the first collection in each worker touches (and so copies) those pages
+        gc.freeze()
@@ -0,0 +1,110 @@
+import cv2
+import numpy as np
+from src.imaging import to_gray
+from src.shapes import ink_mask
+from src.spatial import GridIndex
+from src.textfilter import is_non_text
+
+# Connectors are whatever ink is left once the detected boxes are blanked out.
+# Each connected component is reduced to its two extreme line-segment endpoints;
+# the end with more ink around it carries the arrowhead.
+BOX_PAD = 4
+SNAP_DISTANCE = 25
+MIN_CONNECTOR_LENGTH = 25
+HEAD_RATIO = 1.2
+
+def connector_mask(gray, boxes, pad=BOX_PAD):
+    mask = ink_mask(gray)
+    h, w = mask.shape
+    for b in boxes:
+        x1, y1 = max(0, int(b['x1']) - pad), max(0, int(b['y1']) - pad)
+        x2, y2 = min(w, int(b['x2']) + pad), min(h, int(b['y2']) + pad)
+        mask[y1:y2, x1:x2] = 0
+    return mask
+
+def detect_segments(mask):
+    lines = cv2.HoughLinesP(mask, 1, np.pi / 180, threshold=15, minLineLength=8, maxLineGap=4)
+    if lines is None:
+        return np.empty((0, 4), dtype=np.int32)
+    return lines[:, 0, :]
+
+def find_connectors(mask, min_length=MIN_CONNECTOR_LENGTH):
+    # Returns (tail, head, directed) tuples of (x, y) points
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    segments = detect_segments(mask)
+    if count <= 1 or not len(segments):
+        return []
+    # a segment belongs to the component under one of its endpoints or its midpoint
+    mids = (segments[:, :2] + segments[:, 2:]) // 2
+    seg_labels = np.maximum.reduce([
+        labels[segments[:, 1], segments[:, 0]],
+        labels[segments[:, 3], segments[:, 2]],
+        labels[mids[:, 1], mids[:, 0]],
+    ])
+
+    # group segments by component with one sort instead of a mask per component
+    order = np.argsort(seg_labels, kind='stable')
+    grouped_labels, starts = np.unique(seg_labels[order], return_index=True)
+    groups = np.split(segments[order], starts[1:])
+
+    connectors = []
+    for label, group in zip(grouped_labels, groups):
+        if label == 0:
+            continue
+        x, y, w, h, area = stats[label]
+        if max(w, h) < min_length:
+            continue
+        points = group.reshape(-1, 2).astype(np.float32)
+        # farthest pair of segment endpoints = the two ends of the connector
+        dists = np.linalg.norm(points[:, None, :] - points[None, :, :], axis=2)
+        i, j = np.unravel_index(np.argmax(dists), dists.shape)
+        length = dists[i, j]
+        if length < min_length:
+            continue
+        stroke = max(1.0, area / length)
+        radius = int(max(6, 4 * stroke))
+        component = labels[y:y + h, x:x + w] == label
+        ends = [points[i], points[j]]
+        ink = [_ink_near(component, end[0] - x, end[1] - y, radius) for end in ends]
+        if ink[0] > ink[1]:
+            ends, ink = ends[::-1], ink[::-1]
+        directed = ink[1] >= HEAD_RATIO * max(1, ink[0])
+        connectors.append(((float(ends[0][0]), float(ends[0][1])), (float(ends[1][0]), float(ends[1][1])), directed))
+    return connectors
+
+def _ink_near(component, x, y, radius):
+    x, y = int(round(x)), int(round(y))
+    return int(component[max(0, y - radius):y + radius + 1, max(0, x - radius):x + radius + 1].sum())
+
+def build_box_index(boxes, cell_size=128):
+    index = GridIndex(cell_size)
+    for i, b in enumerate(boxes):
+        index.insert(i, b['x1'], b['y1'], b['x2'], b['y2'])
+    return index
+
+def snap_connectors(boxes, connectors, snap=SNAP_DISTANCE):
+    # Each endpoint only looks at boxes in nearby grid cells, not at every box
+    index = build_box_index(boxes, max(64, 4 * snap))
+    edges, seen = [], set()
+    for tail, head, directed in connectors:
+        start = index.nearest(tail[0], tail[1], snap)
+        end = index.nearest(head[0], head[1], snap)
+        if start is None or end is None or start == end:
+            continue
+        key = (start, end) if directed else tuple(sorted((start, end)))
+        if key in seen:
+            continue
+        seen.add(key)
+        edges.append({"from": start, "to": end})
+    return edges
+
+def detect_arrows(img, boxes, snap=SNAP_DISTANCE):
+    # Boxes the detector labelled as connectors are neither blanked out (their ink is
+    # what we are looking for) nor snap targets; edges index the full boxes list
+    shapes = [i for i, b in enumerate(boxes) if not is_non_text(b)]
+    if not shapes:
+        return []
+    shape_boxes = [boxes[i] for i in shapes]
+    mask = connector_mask(to_gray(img), shape_boxes)
+    edges = snap_connectors(shape_boxes, find_connectors(mask), snap)
+    return [{"from": shapes[e["from"]], "to": shapes[e["to"]]} for e in edges]
@@ -0,0 +1,80 @@
+import os
+from bisect import bisect_right
+import numpy as np
+from src.engine import get_engine
+from src.metrics import timed
+from src.pipeline import preprocess
+from src.textproc import clean_and_correct
+
+# Crops are stacked in a single column so Tesseract never merges text from
+# neighbouring boxes into one line; a canvas is cut when it would get too tall
+BATCH_GAP = int(os.getenv("OCR_BATCH_GAP", "40"))
+BATCH_MAX_HEIGHT = int(os.getenv("OCR_BATCH_MAX_HEIGHT", "6000"))
+
+def plan_canvases(crops, gap=BATCH_GAP, max_height=BATCH_MAX_HEIGHT):
+    # Returns lists of crop indices, one list per canvas
+    canvases, current, height = [], [], gap
+    for i, crop in enumerate(crops):
+        needed = crop.shape[0] + gap
+        if current and height + needed > max_height:
+            canvases.append(current)
+            current, height = [], gap
+        current.append(i)
+        height += needed
+    if current:
+        canvases.append(current)
+    return canvases
+
+def compose_canvas(crops, gap=BATCH_GAP):
+    # crops are thresholded single-channel images with a white background
+    width = max(crop.shape[1] for crop in crops) + 2 * gap
+    height = sum(crop.shape[0] for crop in crops) + gap * (len(crops) + 1)
+    canvas = np.full((height, width), 255, dtype=np.uint8)
+    bands = []
+    y = gap
+    for crop in crops:
+        h, w = crop.shape[:2]
+        canvas[y:y + h, gap:gap + w] = crop
+        bands.append((y, y + h))
+        y += h + gap
+    return canvas, bands
+
+def assign_words(words, bands):
+    # Map each word back to the crop whose band contains its vertical centre
+    tops = [top for top, _ in bands]
+    texts = [[] for _ in bands]
+    for word in words:
+        cy = word['top'] + word['height'] / 2
+        idx = max(0, bisect_right(tops, cy) - 1)
+        texts[idx].append(word['text'])
+    return [' '.join(parts) for parts in texts]
+
+def ocr_canvas(crops, timings=None):
+    # Runs inside the OCR worker pool: one Tesseract pass for a whole stack of crops
+    timings = {} if timings is None else timings
+    with timed('preprocess', timings):
+        canvas, bands = compose_canvas([preprocess(crop) for crop in crops])
+    with timed('tesseract', timings):
+        words = get_engine().image_to_data(canvas)
+    with timed('spell', timings):
+        return [clean_and_correct(text.strip()) for text in assign_words(words, bands)]
+
+def ocr_canvas_timed(crops):
+    timings = {}
+    return ocr_canvas(crops, timings), timings
+
+def batch_jobs(crops):
+    return [(indices, [crops[i] for i in indices]) for indices in plan_canvases(crops)]
+
+def merge_batches(count, jobs, outputs):
+    texts = [''] * count
+    for (indices, _), canvas_texts in zip(jobs, outputs):
+        for i, text in zip(indices, canvas_texts):
+            texts[i] = text
+    return texts
+
+def ocr_batched(crops):
+    if not crops:
+        return []
+    jobs = batch_jobs(crops)
+    return merge_batches(len(crops), jobs, [ocr_canvas(job_crops) for _, job_crops in jobs])
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+def content_hash(data):
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+def make_key(*parts):
+    # parts must be JSON-serialisable; sort_keys keeps dict params stable
+    return content_hash(json.dumps(parts, sort_keys=True, separators=(',', ':')).encode())
+
+class ResultCache:
+    # Size-bounded in-memory LRU with an optional on-disk tier that survives restarts
+    def __init__(self, name, max_entries=1024, disk_dir=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.disk_dir = os.path.join(disk_dir, name) if disk_dir else None
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + '.json')
+
+    def _remember(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, value)
+        return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._remember(key, value)
+        self._write_disk(key, value)
+
+    # Batched forms for callers on the event loop: with the disk tier on these
+    # touch files, so they are run in an executor in one call per request
+    def get_many(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set_many(self, items):
+        for key, value in items:
+            self.set(key, value)
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            # unreadable or corrupt (e.g. truncated by a crash): a miss, recomputed and rewritten
+            logger.warning("%s cache: ignoring %s: %s", self.name, self._path(key), exc)
+            return None
+
+    def _write_disk(self, key, value):
+        if not self.disk_dir:
+            return
+        # best-effort: a full disk or unwritable directory must not fail the request
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            logger.warning("%s cache: could not write %s: %s", self.name, path, exc)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._items),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'disk': bool(self.disk_dir),
+            }
+
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR") or None
+
+detection_cache = ResultCache('detection', int(os.getenv("DETECTION_CACHE_SIZE", "256")), RESULT_CACHE_DIR)
+ocr_cache = ResultCache('ocr', int(os.getenv("OCR_CACHE_SIZE", "20000")), RESULT_CACHE_DIR)
@@ -0,0 +1,231 @@
+# Headless batch processing of image and PDF archives.
+# Run from the repo root:
+#   python -m src.cli data/archive --out data/results --detector opencv --annotate
+#   python -m src.cli "scans/**/*.pdf" "extra/*.png" --out results --workers 8
+# Every page becomes <out>/<relative path>[_pNNN].json (plus .annotated.png with
+# --annotate, and .mmd/.dot/.graph.ndjson/.graph.columnar.json with --graph).
+# Pages whose JSON already exists are skipped, so an interrupted run is resumed
+# by running the same command again.
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import cv2
+from src.arrows import detect_arrows
+from src.batch import ocr_batched
+from src.detect import DETECTOR_BACKEND, boxes_to_predictions, get_detector
+from src.graph import GRAPH_FORMATS, FlowGraph, export_graph, to_ndjson
+from src.imaging import decode_gray, to_gray
+from src.pdf import PDF_DPI, clamp_dpi, page_count, render_page
+from src.pipeline import BOX_MARGIN, crop_box, ocr_crop
+from src.textfilter import OCR_PREFILTER, classify_crops, count_skipped, is_non_text
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp')
+
+def glob_root(pattern):
+    # leading directories of a glob without wildcards; outputs mirror the tree below it
+    parts = []
+    for part in pattern.replace('\\', '/').split('/')[:-1]:
+        if any(c in part for c in '*?['):
+            break
+        parts.append(part)
+    return '/'.join(parts) or '.'
+
+def find_inputs(patterns):
+    # (path, path relative to its input root) for every image/PDF under the given dirs, globs or files
+    found = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                for name in sorted(files):
+                    path = os.path.join(root, name)
+                    found.append((path, os.path.relpath(path, pattern)))
+        else:
+            root = glob_root(pattern)
+            for path in sorted(glob.glob(pattern, recursive=True)):
+                if os.path.isfile(path):
+                    found.append((path, os.path.relpath(path, root)))
+    seen, inputs = set(), []
+    for path, rel in found:
+        if path.lower().endswith(IMAGE_EXTENSIONS + ('.pdf',)) and os.path.abspath(path) not in seen:
+            seen.add(os.path.abspath(path))
+            inputs.append((path, rel))
+    return inputs
+
+def plan_pages(inputs, out_dir):
+    # One task per page; PDFs are opened here only to count pages
+    tasks, failed = [], []
+    owners = {}  # output stem -> input writing it
+    for path, rel in inputs:
+        stem = os.path.join(out_dir, os.path.splitext(rel)[0])
+        if path.lower().endswith('.pdf'):
+            try:
+                pages = page_count(path)
+            except ValueError as exc:
+                failed.append((path, str(exc)))
+                continue
+            planned = [(path, page, f"{stem}_p{page:03d}") for page in range(1, pages + 1)]
+        else:
+            planned = [(path, None, stem)]
+        # e.g. scan.png and scan.jpg: the second would overwrite the first's output,
+        # and on resume be skipped as done
+        clash = next((s for _, _, s in planned if os.path.normcase(s) in owners), None)
+        if clash is not None:
+            owner = owners[os.path.normcase(clash)]
+            failed.append((path, f"output {clash}.json clashes with {owner}; rename one of them"))
+            continue
+        owners.update((os.path.normcase(s), path) for _, _, s in planned)
+        tasks.extend(planned)
+    return tasks, failed
+
+GRAPH_FILES = {'mermaid': '.mmd', 'dot': '.dot', 'ndjson': '.graph.ndjson', 'columnar': '.graph.columnar.json'}
+
+def write_text(path, text):
+    # written to a temp file first so an interrupted run never leaves a half file that resume would skip
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def write_json(path, data):
+    write_text(path, json.dumps(data, indent=2))
+
+def write_graph(stem, graph, formats, source, page):
+    # sidecar files next to the page JSON; 'json' is embedded in the page JSON instead
+    for fmt in formats:
+        if fmt == 'ndjson':
+            write_text(stem + GRAPH_FILES[fmt], to_ndjson(graph, source=source, page=page))
+        elif fmt in GRAPH_FILES:
+            body, _ = export_graph(graph, fmt)
+            write_text(stem + GRAPH_FILES[fmt], body if isinstance(body, str) else json.dumps(body))
+
+def annotate(img, results, arrows):
+    canvas = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    for item in results:
+        b = item['box']
+        x1, y1, x2, y2 = int(b['x1']), int(b['y1']), int(b['x2']), int(b['y2'])
+        cv2.rectangle(canvas, (x1, y1), (x2, y2), (0, 160, 0), 2)
+        for n, line in enumerate((item['ocr_text'] or '').split('\n')):
+            cv2.putText(canvas, line, (x1 + 4, y1 + 16 + 14 * n), cv2.FONT_HERSHEY_SIMPLEX, 0.4,
+                        (0, 0, 255), 1, cv2.LINE_AA)
+    for arrow in arrows:
+        a, b = results[arrow['from']]['box'], results[arrow['to']]['box']
+        start = (int((a['x1'] + a['x2']) / 2), int((a['y1'] + a['y2']) / 2))
+        end = (int((b['x1'] + b['x2']) / 2), int((b['y1'] + b['y2']) / 2))
+        cv2.arrowedLine(canvas, start, end, (255, 0, 0), 2, cv2.LINE_AA, tipLength=0.05)
+    return canvas
+
+def process_page(task, options):
+    # Runs in a worker process; the detector and OCR engine are created there once and reused
+    path, page, stem = task
+    start = time.perf_counter()
+    detector = get_detector(options['detector'])
+    if page is None:
+        with open(path, 'rb') as f:
+            data = f.read()
+        img = decode_gray(data)
+        # hosted detection takes the original bytes, local detectors the decoded page
+        boxes = detector.detect(data) if detector.name == 'roboflow' else detector.detect_image(img)
+        del data
+    else:
+        img = to_gray(render_page(path, page, options['dpi']))
+        boxes = detector.detect_image(img)
+
+    # Like the API: connector boxes (by label) are kept with '' and never cropped,
+    # empty shapes are answered with '' without a Tesseract call
+    kinds = ['non_text' if OCR_PREFILTER and is_non_text(box) else None for box in boxes]
+    shapes = [i for i, kind in enumerate(kinds) if kind is None]
+    crops = {i: crop_box(img, boxes[i]) for i in shapes}
+    for i, kind in zip(shapes, classify_crops([crops[i] for i in shapes], BOX_MARGIN)):
+        kinds[i] = kind
+    todo = [i for i, kind in enumerate(kinds) if kind == 'text']
+    todo_crops = [crops[i] for i in todo]
+    del crops
+    texts = [''] * len(boxes)
+    fresh = ocr_batched(todo_crops) if options['batch'] else [ocr_crop(crop) for crop in todo_crops]
+    for i, text in zip(todo, fresh):
+        texts[i] = text
+    results = [{'box': box, 'ocr_text': text} for box, text in zip(boxes, texts)]
+    arrows = detect_arrows(img, boxes) if options['find_arrows'] else []
+
+    graph = FlowGraph(results, arrows) if options['graph'] else None
+    if graph is not None:
+        # before the page JSON, whose presence marks the page as done
+        write_graph(stem, graph, options['graph'], path, page)
+    write_json(stem + '.json', {
+        'source': path,
+        'page': page,
+        'width': img.shape[1],
+        'height': img.shape[0],
+        'detector': detector.name,
+        'results': results,
+        'arrows': arrows,
+        'skipped': count_skipped(kinds),
+        # Roboflow layout, so the box editor can open the output directly
+        'predictions': [dict(p, ocr_text=r['ocr_text']) for p, r in zip(boxes_to_predictions(boxes), results)],
+        **({'graph': graph.to_dict()} if graph is not None and 'json' in options['graph'] else {}),
+    })
+    if options['annotate']:
+        cv2.imwrite(stem + '.annotated.png', annotate(img, results, arrows))
+    return len(results), time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='flowchart-reader', description="Detect shapes, OCR and arrows for directories or globs of images and PDFs")
+    parser.add_argument('inputs', nargs='+', help="directories, glob patterns or files")
+    parser.add_argument('--out', required=True, help="output directory")
+    parser.add_argument('--detector', default=DETECTOR_BACKEND, help="roboflow, opencv or onnx")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--dpi', type=int, default=PDF_DPI, help="PDF render resolution")
+    parser.add_argument('--batch', action='store_true', help="one Tesseract pass per stacked canvas of boxes")
+    parser.add_argument('--no-arrows', dest='find_arrows', action='store_false')
+    parser.add_argument('--annotate', action='store_true', help="also write <page>.annotated.png")
+    parser.add_argument('--force', action='store_true', help="reprocess pages that already have output")
+    parser.add_argument('--graph', default='', metavar='FORMATS',
+                        help=f"comma-separated graph exports: {', '.join(GRAPH_FORMATS)}")
+    args = parser.parse_args(argv)
+    graph_formats = [fmt.strip() for fmt in args.graph.split(',') if fmt.strip()]
+    unknown = [fmt for fmt in graph_formats if fmt not in GRAPH_FORMATS]
+    if unknown:
+        parser.error(f"unknown graph format(s): {', '.join(unknown)}")
+
+    get_detector(args.detector)  # fail fast on an unknown detector
+    # one Tesseract per core already; its own OpenMP threads would only oversubscribe
+    os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+    inputs = find_inputs(args.inputs)
+    tasks, failed = plan_pages(inputs, args.out)
+    todo = [t for t in tasks if args.force or not os.path.exists(t[2] + '.json')]
+    print(f"{len(inputs)} files, {len(tasks)} pages, {len(tasks) - len(todo)} already done, {len(todo)} to process")
+
+    options = {'detector': args.detector, 'dpi': clamp_dpi(args.dpi), 'batch': args.batch,
+               'find_arrows': args.find_arrows, 'annotate': args.annotate, 'graph': graph_formats}
+    start = time.perf_counter()
+    done = boxes = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {pool.submit(process_page, task, options): task for task in todo}
+        for future in as_completed(futures):
+            path, page, _ = futures[future]
+            try:
+                count, _ = future.result()
+            except Exception as exc:
+                failed.append((path if page is None else f"{path} page {page}", str(exc)))
+                continue
+            done += 1
+            boxes += count
+            if done % 25 == 0 or done == len(todo):
+                elapsed = time.perf_counter() - start
+                print(f"{done}/{len(todo)} pages  {done / elapsed:.2f} pages/s")
+
+    elapsed = time.perf_counter() - start
+    rate = done / elapsed if elapsed and done else 0.0
+    print(f"processed {done} pages ({boxes} boxes) in {elapsed:.1f}s  {rate:.2f} pages/s  failed: {len(failed)}")
+    for source, error in failed:
+        print(f"FAILED {source}: {error}", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+import ast
+import base64
+import os
+import threading
+import cv2
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from src.imaging import decode_image, to_gray
+from src.metrics import DETECT_UPLOAD_BYTES
+from src.shapes import detect_shapes
+
+DETECTOR_BACKEND = os.getenv("DETECTOR_BACKEND", "roboflow").lower()  # roboflow | opencv | onnx
+DETECTOR_ONNX_MODEL = os.getenv("DETECTOR_ONNX_MODEL")
+DETECTOR_ONNX_LABELS = os.getenv("DETECTOR_ONNX_LABELS")  # comma-separated, overrides model metadata
+DETECTOR_CONFIDENCE = float(os.getenv("DETECTOR_CONFIDENCE", "0.4"))
+
+ROBOFLOW_API_URL = os.getenv("ROBOFLOW_API_URL", "https://serverless.roboflow.com")
+ROBOFLOW_MODEL_ID = os.getenv("ROBOFLOW_MODEL_ID", "aiboardscannerdatasetcomplete-vvbe4/11")
+ROBOFLOW_CONNECT_TIMEOUT = float(os.getenv("ROBOFLOW_CONNECT_TIMEOUT", "5"))
+ROBOFLOW_TIMEOUT = float(os.getenv("ROBOFLOW_TIMEOUT", "30"))
+ROBOFLOW_RETRIES = int(os.getenv("ROBOFLOW_RETRIES", "2"))
+ROBOFLOW_POOL_SIZE = int(os.getenv("ROBOFLOW_POOL_SIZE", "10"))
+
+class RoboflowClient:
+    # Keeps one pooled HTTP session for the hosted model instead of a new client per request
+    def __init__(self, api_url=ROBOFLOW_API_URL, api_key=None, timeout=ROBOFLOW_TIMEOUT,
+                 connect_timeout=ROBOFLOW_CONNECT_TIMEOUT, retries=ROBOFLOW_RETRIES, pool_size=ROBOFLOW_POOL_SIZE):
+        self.api_url = api_url.rstrip('/')
+        self.api_key = api_key if api_key is not None else os.getenv("ROBOFLOW_API_KEY")
+        self.timeout = (connect_timeout, timeout)
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({'POST'}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def infer(self, image_bytes, model_id=ROBOFLOW_MODEL_ID):
+        # Same wire format as inference_sdk: base64 body, api_key as query param
+        response = self.session.post(
+            f"{self.api_url}/{model_id}",
+            params={'api_key': self.api_key},
+            data=base64.b64encode(image_bytes),
+            headers={'Content-Type': 'application/x-www-form-urlencoded'},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def close(self):
+        self.session.close()
+
+def predictions_to_boxes(result):
+    # Convert Roboflow centre/size predictions to the frontend box format
+    boxes = []
+    for pred in result.get("predictions", []):
+        x1 = int(pred['x'] - pred['width'] / 2)
+        y1 = int(pred['y'] - pred['height'] / 2)
+        x2 = int(pred['x'] + pred['width'] / 2)
+        y2 = int(pred['y'] + pred['height'] / 2)
+        boxes.append({"x1": x1, "y1": y1, "x2": x2, "y2": y2, "label": pred.get('class') or "box"})
+    return boxes
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_roboflow_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = RoboflowClient()
+        return _client
+
+def close_roboflow_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+def boxes_to_predictions(boxes):
+    # Inverse of predictions_to_boxes, for tools that read the Roboflow JSON layout
+    return [
+        {"x": (b["x1"] + b["x2"]) / 2, "y": (b["y1"] + b["y2"]) / 2,
+         "width": b["x2"] - b["x1"], "height": b["y2"] - b["y1"], "class": b.get("label", "")}
+        for b in boxes
+    ]
+
+class RoboflowDetector:
+    name = 'roboflow'
+
+    def __init__(self, model_id=ROBOFLOW_MODEL_ID):
+        self.model_id = model_id
+
+    def detect(self, image_bytes):
+        DETECT_UPLOAD_BYTES.inc(len(image_bytes), detector=self.name)
+        return predictions_to_boxes(get_roboflow_client().infer(image_bytes, self.model_id))
+
+    def detect_image(self, img):
+        # already-decoded pages (e.g. from a PDF) are encoded in memory for upload
+        ok, buf = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        if not ok:
+            raise ValueError("Could not encode image")
+        return self.detect(buf.tobytes())
+
+class OpenCVDetector:
+    # Local CPU-only contour detector; latency is bounded by the page size, not the network
+    name = 'opencv'
+    model_id = 'opencv-shapes-1'
+
+    def detect(self, image_bytes):
+        return detect_shapes(decode_image(image_bytes, cv2.IMREAD_GRAYSCALE))
+
+    def detect_image(self, img):
+        return detect_shapes(to_gray(img))
+
+class OnnxDetector:
+    # YOLOv8-style export (e.g. from Roboflow/Ultralytics), loaded once per process
+    name = 'onnx'
+
+    def __init__(self, model_path=DETECTOR_ONNX_MODEL, labels=DETECTOR_ONNX_LABELS, confidence=DETECTOR_CONFIDENCE):
+        if not model_path:
+            raise ValueError("DETECTOR_ONNX_MODEL is not set")
+        import onnxruntime
+        self.session = onnxruntime.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_size = model_input.shape[2] if isinstance(model_input.shape[2], int) else 640
+        self.confidence = confidence
+        self.model_id = f"onnx:{os.path.basename(model_path)}"
+        if labels:
+            self.labels = [label.strip() for label in labels.split(',')]
+        else:
+            names = self.session.get_modelmeta().custom_metadata_map.get('names')
+            self.labels = list(ast.literal_eval(names).values()) if names else []
+
+    def detect(self, image_bytes):
+        return self.detect_image(decode_image(image_bytes))
+
+    def detect_image(self, img):
+        if img.ndim == 2:
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        h, w = img.shape[:2]
+        scale = self.input_size / max(h, w)
+        resized = cv2.resize(img, (max(1, round(w * scale)), max(1, round(h * scale))))
+        canvas = np.full((self.input_size, self.input_size, 3), 114, dtype=np.uint8)
+        canvas[:resized.shape[0], :resized.shape[1]] = resized
+        blob = cv2.dnn.blobFromImage(canvas, 1 / 255.0, swapRB=True)
+        output = self.session.run(None, {self.input_name: blob})[0][0]
+        preds = output.T if output.shape[0] < output.shape[1] else output  # (N, 4 + classes)
+        scores = preds[:, 4:]
+        class_ids = scores.argmax(axis=1)
+        confidences = scores.max(axis=1)
+        keep = confidences >= self.confidence
+        class_ids, confidences = class_ids[keep], confidences[keep]
+        cx, cy, bw, bh = (preds[keep, :4] / scale).T
+        rects = np.stack([cx - bw / 2, cy - bh / 2, bw, bh], axis=1)
+        indices = cv2.dnn.NMSBoxes(rects.tolist(), confidences.tolist(), self.confidence, 0.5)
+        boxes = []
+        for i in np.array(indices).reshape(-1):
+            x, y, bw_i, bh_i = rects[i]
+            class_id = int(class_ids[i])
+            boxes.append({
+                "x1": int(max(0, x)), "y1": int(max(0, y)),
+                "x2": int(min(w, x + bw_i)), "y2": int(min(h, y + bh_i)),
+                "label": self.labels[class_id] if class_id < len(self.labels) else "box",
+            })
+        return boxes
+
+DETECTORS = {
+    'roboflow': RoboflowDetector,
+    'opencv': OpenCVDetector,
+    'onnx': OnnxDetector,
+}
+
+_detectors = {}
+_detectors_lock = threading.Lock()
+
+def get_detector(name=None):
+    name = (name or DETECTOR_BACKEND).lower()
+    if name not in DETECTORS:
+        raise ValueError(f"Unknown detector '{name}', expected one of: {', '.join(DETECTORS)}")
+    with _detectors_lock:
+        if name not in _detectors:
+            _detectors[name] = DETECTORS[name]()
+        return _detectors[name]
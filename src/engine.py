@@ -0,0 +1,123 @@
+import os
+import threading
+import numpy as np
+
+try:
+    import tesserocr
+except ImportError:  # optional, needs libtesseract headers to build
+    tesserocr = None
+
+# prefer env var inside container, fallback to system binary
+TESSERACT_CMD = os.getenv("TESSERACT_CMD", "tesseract")
+
+OCR_BACKEND = os.getenv("OCR_BACKEND", "auto").lower()  # auto | tesserocr | pytesseract
+OCR_LANG = 'eng'
+
+class PytesseractEngine:
+    # Fallback: forks a tesseract process (and reloads the model) for every call
+    name = 'pytesseract'
+
+    def __init__(self, lang=OCR_LANG, psm=6):
+        # imported here: with tesserocr installed pytesseract (and PIL) is never loaded
+        import pytesseract
+        pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+        self.pytesseract = pytesseract
+        self.lang = lang
+        self.config = f'--oem 1 --psm {psm}'
+
+    def image_to_string(self, img):
+        return self.pytesseract.image_to_string(img, config=self.config, lang=self.lang)
+
+    def image_to_data(self, img):
+        data = self.pytesseract.image_to_data(
+            img, config=self.config, lang=self.lang, output_type=self.pytesseract.Output.DICT)
+        words = []
+        for i, text in enumerate(data['text']):
+            if not text.strip():
+                continue
+            words.append({
+                'text': text,
+                'conf': float(data['conf'][i]),
+                'left': data['left'][i],
+                'top': data['top'][i],
+                'width': data['width'][i],
+                'height': data['height'][i],
+            })
+        return words
+
+class TesserocrEngine:
+    # Long-lived libtesseract handle; the LSTM model is loaded once per engine
+    name = 'tesserocr'
+
+    def __init__(self, lang=OCR_LANG, psm=6):
+        kwargs = {}
+        if os.getenv("TESSDATA_PREFIX"):
+            kwargs['path'] = os.getenv("TESSDATA_PREFIX")
+        self.api = tesserocr.PyTessBaseAPI(lang=lang, psm=psm, oem=tesserocr.OEM.LSTM_ONLY, **kwargs)
+
+    def set_image(self, img):
+        img = np.ascontiguousarray(img, dtype=np.uint8)
+        height, width = img.shape[:2]
+        channels = 1 if img.ndim == 2 else img.shape[2]
+        self.api.SetImageBytes(img.tobytes(), width, height, channels, width * channels)
+
+    def image_to_string(self, img):
+        self.set_image(img)
+        return self.api.GetUTF8Text()
+
+    def image_to_data(self, img):
+        self.set_image(img)
+        self.api.Recognize()
+        words = []
+        iterator = self.api.GetIterator()
+        if iterator is None:
+            return words
+        level = tesserocr.RIL.WORD
+        for word in tesserocr.iterate_level(iterator, level):
+            text = word.GetUTF8Text(level)
+            if not text or not text.strip():
+                continue
+            x1, y1, x2, y2 = word.BoundingBox(level)
+            words.append({
+                'text': text,
+                'conf': word.Confidence(level),
+                'left': x1,
+                'top': y1,
+                'width': x2 - x1,
+                'height': y2 - y1,
+            })
+        return words
+
+    def close(self):
+        self.api.End()
+
+def create_engine(backend=None, psm=6):
+    backend = (backend or OCR_BACKEND).lower()
+    if backend in ('auto', 'tesserocr') and tesserocr is not None:
+        try:
+            return TesserocrEngine(psm=psm)
+        except RuntimeError:
+            if backend == 'tesserocr':
+                raise
+    elif backend == 'tesserocr':
+        raise RuntimeError("OCR_BACKEND=tesserocr but the tesserocr package is not installed")
+    return PytesseractEngine(psm=psm)
+
+# libtesseract handles are not thread-safe, so every pool worker binds its own
+_local = threading.local()
+
+def _forget_engines():
+    # a forked child (gunicorn worker, process pool) must not reuse handles created
+    # before the fork; it builds its own on first use
+    _local.__dict__.clear()
+
+os.register_at_fork(after_in_child=_forget_engines)
+
+def get_engine(backend=None, psm=6):
+    key = ((backend or OCR_BACKEND).lower(), psm)
+    engines = getattr(_local, 'engines', None)
+    if engines is None:
+        engines = _local.engines = {}
+    if key not in engines:
+        engines[key] = create_engine(*key)
+    return engines[key]
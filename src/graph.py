@@ -0,0 +1,167 @@
+import hashlib
+import json
+import re
+from collections import deque
+
+# Graph view of one page: OCR results become nodes with IDs derived from the box
+# itself (not its position in the list, so deleting or reordering boxes doesn't
+# renumber the rest) and positional arrows become edges between those IDs.
+# Exporters below write the same graph as JSON, Mermaid, Graphviz DOT, NDJSON
+# (one node/edge per line) or columnar JSON (one array per field).
+GRAPH_FORMATS = ('json', 'mermaid', 'dot', 'ndjson', 'columnar')
+COORDS = ('x1', 'y1', 'x2', 'y2')
+DECISION_LABELS = ('diamond', 'decision')
+TERMINAL_LABELS = ('oval', 'terminal', 'start', 'end')
+
+def node_id(box):
+    # a client-supplied id wins; otherwise a short hash of the box geometry
+    if box.get('id') not in (None, ''):
+        return str(box['id'])
+    coords = ','.join(str(int(round(float(box[k])))) for k in COORDS)
+    return 'n' + hashlib.sha1(coords.encode('ascii')).hexdigest()[:10]
+
+def reading_order(node):
+    return (node['y1'], node['x1'])
+
+class FlowGraph:
+    def __init__(self, results, arrows):
+        # results: [{'box', 'ocr_text'}]; arrows: [{'from', 'to'}] indexing results
+        self.nodes = {}
+        ids = []
+        for item in results:
+            box = item['box']
+            base = nid = node_id(box)
+            n = 2
+            while nid in self.nodes:  # identical boxes
+                nid = f"{base}_{n}"
+                n += 1
+            ids.append(nid)
+            self.nodes[nid] = {
+                'id': nid,
+                'text': item.get('ocr_text', ''),
+                'label': box.get('label', ''),
+                **{k: box[k] for k in COORDS},
+            }
+        self.successors = {nid: [] for nid in self.nodes}
+        self.predecessors = {nid: [] for nid in self.nodes}
+        self.edges = []
+        for arrow in arrows:
+            if arrow is None:
+                continue
+            a, b = arrow.get('from'), arrow.get('to')
+            if not (isinstance(a, int) and isinstance(b, int) and 0 <= a < len(ids) and 0 <= b < len(ids)):
+                continue
+            source, target = ids[a], ids[b]
+            if target in self.successors[source]:
+                continue
+            self.edges.append({'from': source, 'to': target})
+            self.successors[source].append(target)
+            self.predecessors[target].append(source)
+        # neighbours in reading order, so traversal and exports are deterministic
+        for adjacency in (self.successors, self.predecessors):
+            for nid, neighbours in adjacency.items():
+                neighbours.sort(key=lambda other: reading_order(self.nodes[other]))
+
+    def start_nodes(self):
+        # nodes nothing points to; a diagram that is one big cycle starts at its first node
+        ordered = sorted(self.nodes.values(), key=reading_order)
+        starts = [n['id'] for n in ordered if not self.predecessors[n['id']] and self.successors[n['id']]]
+        if not starts and self.edges:
+            starts = [next(n['id'] for n in ordered if self.successors[n['id']])]
+        return starts
+
+    def steps(self, starts=None):
+        # Breadth-first from the start nodes: each connected node once, numbered in
+        # the order a reader would follow the arrows; branches keep reading order.
+        # Without explicit starts, parts no start reaches (e.g. a separate loop)
+        # follow from their first node in reading order
+        explicit = starts is not None
+        starts = [s for s in starts if s in self.nodes] if explicit else self.start_nodes()
+        seen, queue, steps = set(starts), deque(starts), []
+        remaining = [] if explicit else sorted(
+            (n for n in self.nodes.values() if self.successors[n['id']] or self.predecessors[n['id']]),
+            key=reading_order)
+        while queue or remaining:
+            if not queue:
+                nid = remaining.pop(0)['id']
+                if nid in seen:
+                    continue
+                seen.add(nid)
+                queue.append(nid)
+            nid = queue.popleft()
+            node = self.nodes[nid]
+            steps.append({'step': len(steps) + 1, 'id': nid, 'text': node['text'], 'next': self.successors[nid]})
+            for target in self.successors[nid]:
+                if target not in seen:
+                    seen.add(target)
+                    queue.append(target)
+        return steps
+
+    def to_dict(self):
+        return {
+            'nodes': list(self.nodes.values()),
+            'edges': self.edges,
+            'starts': self.start_nodes(),
+            'steps': self.steps(),
+        }
+
+def mermaid_text(text):
+    return '"' + (text or ' ').replace('"', '#quot;').replace('\n', '<br>') + '"'
+
+def mermaid_id(nid):
+    # client ids may contain characters Mermaid reads as syntax
+    return re.sub(r'\W', '_', nid)
+
+def to_mermaid(graph):
+    lines = ['flowchart TD']
+    for node in graph.nodes.values():
+        nid, label, text = mermaid_id(node['id']), str(node['label']).lower(), mermaid_text(node['text'])
+        if label in DECISION_LABELS:
+            lines.append(f"    {nid}{{{text}}}")
+        elif label in TERMINAL_LABELS:
+            lines.append(f"    {nid}([{text}])")
+        else:
+            lines.append(f"    {nid}[{text}]")
+    lines.extend(f"    {mermaid_id(edge['from'])} --> {mermaid_id(edge['to'])}" for edge in graph.edges)
+    return '\n'.join(lines) + '\n'
+
+def dot_text(text):
+    return '"' + (text or '').replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+
+def to_dot(graph, name='flowchart'):
+    lines = [f'digraph {dot_text(name)} {{']
+    for node in graph.nodes.values():
+        label = str(node['label']).lower()
+        shape = 'diamond' if label in DECISION_LABELS else 'ellipse' if label in TERMINAL_LABELS else 'box'
+        lines.append(f"  {dot_text(node['id'])} [label={dot_text(node['text'])}, shape={shape}];")
+    lines.extend(f"  {dot_text(edge['from'])} -> {dot_text(edge['to'])};" for edge in graph.edges)
+    lines.append('}')
+    return '\n'.join(lines) + '\n'
+
+def to_ndjson(graph, **extra):
+    # extra fields (e.g. document=...) are repeated on every line so files can be concatenated
+    lines = [json.dumps({'type': 'node', **extra, **node}) for node in graph.nodes.values()]
+    lines.extend(json.dumps({'type': 'edge', **extra, **edge}) for edge in graph.edges)
+    return '\n'.join(lines) + '\n' if lines else ''
+
+def to_columnar(graph):
+    nodes = list(graph.nodes.values())
+    fields = ('id', 'text', 'label') + COORDS
+    return {
+        'nodes': {field: [node[field] for node in nodes] for field in fields},
+        'edges': {'from': [edge['from'] for edge in graph.edges], 'to': [edge['to'] for edge in graph.edges]},
+    }
+
+def export_graph(graph, fmt):
+    # -> (body, media type); body is a str except for the JSON formats
+    if fmt == 'mermaid':
+        return to_mermaid(graph), 'text/vnd.mermaid'
+    if fmt == 'dot':
+        return to_dot(graph), 'text/vnd.graphviz'
+    if fmt == 'ndjson':
+        return to_ndjson(graph), 'application/x-ndjson'
+    if fmt == 'columnar':
+        return to_columnar(graph), 'application/json'
+    if fmt == 'json':
+        return graph.to_dict(), 'application/json'
+    raise ValueError(f"Unknown graph format '{fmt}', expected one of: {', '.join(GRAPH_FORMATS)}")
@@ -0,0 +1,79 @@
+import io
+import os
+import cv2
+import numpy as np
+
+# Uploads are decoded once, straight from the request bytes, into a single
+# grayscale page; every box crop is then a view into that buffer.
+# Opt-in: decode at 1/2, 1/4 or 1/8 resolution when even the smallest box keeps
+# at least this many pixels of height after reduction (0 disables it)
+REDUCED_DECODE_MIN_HEIGHT = int(os.getenv("OCR_REDUCED_DECODE_MIN_HEIGHT", "0"))
+
+REDUCED_GRAYSCALE_FLAGS = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+def to_gray(img):
+    if img.ndim == 2:
+        return img
+    if img.shape[2] == 4:
+        return cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY)
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+def decode_image(data, flags=cv2.IMREAD_COLOR):
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), flags)
+    if img is None:
+        raise ValueError("Could not decode image")
+    return img
+
+def image_size(data):
+    # (width, height) read from the file header without decoding the pixels; None when
+    # PIL can't tell. Imported on first use, like pdf2image in src.pdf
+    from PIL import Image, UnidentifiedImageError
+    try:
+        with Image.open(io.BytesIO(data)) as im:
+            return im.size
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        # the bomb check trips on very large scans; callers decode those anyway
+        return None
+
+def png_has_alpha(data):
+    # IHDR colour type 4 (grey + alpha) or 6 (RGBA); read from the header, no decode
+    return data[:8] == PNG_SIGNATURE and len(data) > 25 and data[25] in (4, 6)
+
+def choose_reduction(boxes, min_height=REDUCED_DECODE_MIN_HEIGHT):
+    if not min_height or not boxes:
+        return 1
+    smallest = min(abs(int(b['y2']) - int(b['y1'])) for b in boxes)
+    for factor in (8, 4, 2):
+        if smallest / factor >= min_height:
+            return factor
+    return 1
+
+def scale_boxes(boxes, reduction):
+    if reduction == 1:
+        return boxes
+    return [dict(b, x1=b['x1'] / reduction, y1=b['y1'] / reduction, x2=b['x2'] / reduction, y2=b['y2'] / reduction)
+            for b in boxes]
+
+def decode_gray(data, reduction=1):
+    if png_has_alpha(data):
+        # transparent pixels would decode as black; flatten onto white first
+        rgba = decode_image(data, cv2.IMREAD_UNCHANGED)
+        if rgba.dtype != np.uint8:
+            rgba = (rgba // 257).astype(np.uint8)  # 16-bit PNG
+        if rgba.ndim == 3 and rgba.shape[2] == 4:
+            alpha = rgba[:, :, 3:4].astype(np.float32) / 255.0
+            bgr = rgba[:, :, :3].astype(np.float32) * alpha + 255.0 * (1.0 - alpha)
+            gray = to_gray(bgr.astype(np.uint8))
+        else:
+            gray = to_gray(rgba)
+        if reduction > 1:
+            gray = cv2.resize(gray, None, fx=1 / reduction, fy=1 / reduction, interpolation=cv2.INTER_AREA)
+        return gray
+    return decode_image(data, REDUCED_GRAYSCALE_FLAGS.get(reduction, cv2.IMREAD_GRAYSCALE))
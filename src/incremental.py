@@ -0,0 +1,38 @@
+import os
+from src.spatial import GridIndex
+
+# Boxes whose corners all moved by at most this many pixels keep their previous text
+BOX_TOLERANCE = float(os.getenv("OCR_BOX_TOLERANCE", "3"))
+COORDS = ('x1', 'y1', 'x2', 'y2')
+
+def box_deviation(a, b):
+    return max(abs(float(a[k]) - float(b[k])) for k in COORDS)
+
+def box_label(box):
+    # relabelling (e.g. to or from a connector class the OCR prefilter skips) changes the result
+    return str(box.get('label', '')).lower()
+
+def diff_boxes(previous, boxes, tolerance=BOX_TOLERANCE):
+    # previous: [{'box', 'ocr_text'}] from an earlier run on the same image.
+    # Returns ({new index: previous text}, [new indices that need OCR]).
+    index = GridIndex(cell_size=max(32, 8 * tolerance))
+    for i, item in enumerate(previous):
+        b = item['box']
+        index.insert(i, b['x1'], b['y1'], b['x2'], b['y2'])
+
+    reused, used = {}, set()
+    for j, box in enumerate(boxes):
+        # a matching previous box contains a point within tolerance of this box's top-left corner
+        best, best_dev = None, None
+        label = box_label(box)
+        for i in index.query_point(float(box['x1']), float(box['y1']), tolerance):
+            if i in used or box_label(previous[i]['box']) != label:
+                continue
+            dev = box_deviation(previous[i]['box'], box)
+            if dev <= tolerance and (best_dev is None or dev < best_dev):
+                best, best_dev = i, dev
+        if best is not None:
+            used.add(best)
+            reused[j] = previous[best]['ocr_text']
+    changed = [j for j in range(len(boxes)) if j not in reused]
+    return reused, changed
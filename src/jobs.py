@@ -0,0 +1,282 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+import uuid
+from src.arrows import detect_arrows
+from src.cache import content_hash, make_key, detection_cache, ocr_cache
+from src.imaging import decode_gray, to_gray
+from src.metrics import BOXES, call_timed, record
+from src.pdf import page_count, render_page
+from src.pipeline import BOX_MARGIN, crop_box, ocr_cache_key, ocr_crop
+from src.textfilter import OCR_PREFILTER, classify_crop, count_skipped, is_non_text
+
+# Long-running work (big diagrams, many pages) runs on its own worker threads,
+# one job per worker, so interactive /ocr requests and /health never queue behind it
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "100"))
+JOB_MAX_BOXES = int(os.getenv("JOB_MAX_BOXES", "5000"))
+JOB_MAX_PAGES = int(os.getenv("JOB_MAX_PAGES", "500"))
+JOB_MAX_UPLOAD_MB = float(os.getenv("JOB_MAX_UPLOAD_MB", "200"))
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", "3600"))
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", "3600"))  # seconds finished jobs stay pollable
+
+class QueueFull(Exception):
+    pass
+
+class JobCancelled(Exception):
+    pass
+
+class JobLimitExceeded(Exception):
+    pass
+
+class Job:
+    def __init__(self, kind, priority=10):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.priority = priority
+        self.status = 'queued'
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.done = 0
+        self.total = None
+        self.unit = 'boxes'
+        self.pages = []
+        self.cleanup = None  # called once the job finishes or is dropped from the queue
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    def check(self):
+        # called between units of work
+        if self._cancel.is_set():
+            raise JobCancelled()
+        if self.started and time.time() - self.started > JOB_TIMEOUT:
+            raise JobLimitExceeded(f"Job exceeded JOB_TIMEOUT ({JOB_TIMEOUT:.0f}s)")
+
+    def add_page(self, page):
+        with self._lock:
+            self.pages.append(page)
+        return page
+
+    def advance(self, count=1):
+        with self._lock:
+            self.done += count
+
+    def cancel(self):
+        self._cancel.set()
+
+    def release(self):
+        cleanup, self.cleanup = self.cleanup, None
+        if cleanup is not None:
+            cleanup()
+
+    def state(self, include_results=True):
+        with self._lock:
+            state = {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": 'cancelling' if self.status == 'running' and self._cancel.is_set() else self.status,
+                "priority": self.priority,
+                "progress": {"done": self.done, "total": self.total, "unit": self.unit},
+                "error": self.error,
+                "created": self.created,
+                "started": self.started,
+                "finished": self.finished,
+            }
+            if include_results:
+                state["pages"] = [dict(page, results=list(page["results"])) for page in self.pages]
+            return state
+
+class JobQueue:
+    # Priority queue (lower number runs first, FIFO within a priority) drained by worker threads
+    def __init__(self, workers=JOB_WORKERS, max_queued=JOB_MAX_QUEUED, retention=JOB_RETENTION):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.retention = retention
+        self._heap = []
+        self._seq = itertools.count()
+        self._jobs = {}
+        self._running = 0
+        self._cond = threading.Condition()
+        self._threads = []
+        self._stopping = False
+
+    def start(self):
+        with self._cond:
+            if self._threads:
+                return
+            self._stopping = False
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            for job in self._jobs.values():
+                job.cancel()
+            for _, _, job, _, _ in self._heap:
+                job.release()
+            self._heap = []
+            self._cond.notify_all()
+        self._threads = []
+
+    def submit(self, job, fn, *args):
+        with self._cond:
+            self._expire()
+            if len(self._heap) >= self.max_queued:
+                raise QueueFull(f"Job queue is full ({self.max_queued} queued)")
+            self._jobs[job.id] = job
+            heapq.heappush(self._heap, (job.priority, next(self._seq), job, fn, args))
+            self._cond.notify()
+        self.start()
+        return job
+
+    def get(self, job_id):
+        with self._cond:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job.cancel()
+            if job.status == 'queued':
+                # drop it from the heap now so queue depth stays accurate
+                self._heap = [entry for entry in self._heap if entry[2] is not job]
+                heapq.heapify(self._heap)
+                job.status = 'cancelled'
+                job.finished = time.time()
+                job.release()
+            return job
+
+    def _expire(self):
+        now = time.time()
+        for job_id in [j.id for j in self._jobs.values() if j.finished and now - j.finished > self.retention]:
+            del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._heap and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                _, _, job, fn, args = heapq.heappop(self._heap)
+                job.status = 'running'
+                job.started = time.time()
+                self._running += 1
+            try:
+                fn(job, *args)
+                job.status = 'done'
+            except JobCancelled:
+                job.status = 'cancelled'
+            except Exception as exc:
+                job.status = 'failed'
+                job.error = str(exc)
+            finally:
+                job.release()
+                job.finished = time.time()
+                with self._cond:
+                    self._running -= 1
+
+    def stats(self):
+        with self._cond:
+            return {
+                "queued": len(self._heap),
+                "running": self._running,
+                "workers": self.workers,
+                "max_queued": self.max_queued,
+                "jobs": len(self._jobs),
+            }
+
+def detect_boxes(detector, image_hash, detect, arg):
+    # shares the detection cache with /cvmodel, /analyze and /pdf
+    key = make_key('detection', detector.name, detector.model_id, image_hash)
+    boxes = detection_cache.get(key)
+    if boxes is None:
+        boxes, timings = call_timed(f"detect_{detector.name}", detect, arg)
+        record(timings)
+        detection_cache.set(key, boxes)
+    return boxes
+
+def ocr_boxes(job, page, img, image_hash, boxes, count_boxes=True):
+    # OCR box by box so progress, partial results and cancellation stay fine-grained
+    for box in boxes:
+        job.check()
+        if OCR_PREFILTER and is_non_text(box):
+            text = ''
+            count_skipped(['non_text'], page["skipped"])
+            BOXES.inc(source='skipped')
+        else:
+            key = ocr_cache_key(image_hash, box)
+            text = ocr_cache.get(key)
+            if text is None:
+                crop = crop_box(img, box)
+                if classify_crop(crop, margin=BOX_MARGIN) == 'text':
+                    timings = {}
+                    text = ocr_crop(crop, timings)
+                    record(timings)
+                    BOXES.inc(source='ocr')
+                else:
+                    text = ''
+                    count_skipped(['empty'], page["skipped"])
+                    BOXES.inc(source='skipped')
+                ocr_cache.set(key, text)
+            else:
+                BOXES.inc(source='cache')
+        page["results"].append({'box': box, 'ocr_text': text})
+        if count_boxes:
+            job.advance()
+
+def run_image_job(job, data, boxes, detector=None, find_arrows=False):
+    image_hash = content_hash(data)
+    img = decode_gray(data)
+    if boxes is None:
+        if detector.name == 'roboflow':
+            boxes = detect_boxes(detector, image_hash, detector.detect, data)
+        else:
+            boxes = detect_boxes(detector, image_hash, detector.detect_image, img)
+    del data
+    if len(boxes) > JOB_MAX_BOXES:
+        raise JobLimitExceeded(f"{len(boxes)} boxes exceeds JOB_MAX_BOXES ({JOB_MAX_BOXES})")
+    job.total = len(boxes)
+    page = job.add_page({"page": 1, "boxes": boxes, "results": [], "arrows": [],
+                         "skipped": {'empty': 0, 'non_text': 0}})
+    ocr_boxes(job, page, img, image_hash, boxes)
+    if find_arrows:
+        page["arrows"] = detect_arrows(img, boxes)
+
+def run_pdf_job(job, pdf_path, pdf_hash, detector, dpi, find_arrows=False):
+    # the spooled file is removed by job.cleanup, set when the job is submitted
+    pages = page_count(pdf_path)
+    if pages > JOB_MAX_PAGES:
+        raise JobLimitExceeded(f"{pages} pages exceeds JOB_MAX_PAGES ({JOB_MAX_PAGES})")
+    job.unit = 'pages'
+    job.total = pages
+    boxes_seen = 0
+    for number in range(1, pages + 1):
+        job.check()
+        img = render_page(pdf_path, number, dpi)
+        page_hash = f"{pdf_hash}:{number}:{dpi}"
+        boxes = detect_boxes(detector, page_hash, detector.detect_image, img)
+        boxes_seen += len(boxes)
+        if boxes_seen > JOB_MAX_BOXES:
+            raise JobLimitExceeded(f"More than JOB_MAX_BOXES ({JOB_MAX_BOXES}) boxes in this PDF")
+        gray = to_gray(img)
+        del img
+        page = job.add_page({"page": number, "boxes": boxes, "results": [], "arrows": [],
+                             "skipped": {'empty': 0, 'non_text': 0}})
+        # progress is counted in pages for PDFs
+        ocr_boxes(job, page, gray, page_hash, boxes, count_boxes=False)
+        if find_arrows:
+            page["arrows"] = detect_arrows(gray, boxes)
+        job.advance()
+
+jobs = JobQueue()
@@ -0,0 +1,141 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Minimal Prometheus text-format registry (no extra dependency). Stage timings
+# are measured where the work happens and returned as plain dicts, so they also
+# come back from process-pool workers; the web process records them here.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{format_labels(self.labels, key)} {format_value(value)}')
+        return lines
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets + (float('inf'),), series[:-2] + [series[-1]]):
+                    labels = format_labels(self.labels, key, [('le', format_value(bound))])
+                    lines.append(f'{self.name}_bucket{labels} {count}')
+                labels = format_labels(self.labels, key)
+                lines.append(f'{self.name}_sum{labels} {format_value(series[-2])}')
+                lines.append(f'{self.name}_count{labels} {series[-1]}')
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help, labels=()):
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn):
+        # fn() -> [(name, type, help, [(labels dict, value), ...]), ...], read at scrape time
+        self._collectors.append(fn)
+        return fn
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for fn in self._collectors:
+            for name, kind, help, samples in fn():
+                lines.append(f'# HELP {name} {help}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in samples:
+                    lines.append(f'{name}{format_labels(labels.keys(), labels.values())} {format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    'flowchart_stage_seconds', 'Time spent per pipeline stage (per box for preprocess/tesseract/spell).', ['stage'])
+REQUEST_SECONDS = registry.histogram(
+    'flowchart_request_seconds', 'Request latency until the response starts.', ['endpoint'])
+BOXES = registry.counter(
+    'flowchart_boxes_total', 'Boxes processed, by where their text came from (ocr, cache, reused, skipped).', ['source'])
+DETECT_UPLOAD_BYTES = registry.counter(
+    'flowchart_detect_upload_bytes_total', 'Image bytes sent to a hosted detector (before base64).', ['detector'])
+ERRORS = registry.counter(
+    'flowchart_errors_total', 'Requests that failed, by endpoint and status code.', ['endpoint', 'status'])
+
+@contextmanager
+def timed(stage, timings):
+    # Adds the elapsed seconds to timings[stage]; touches no global state
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+def record(timings, into=None):
+    # Observe one unit of work's stage timings and add them to a request total
+    for stage, seconds in timings.items():
+        STAGE_SECONDS.observe(seconds, stage=stage)
+        if into is not None:
+            into[stage] = into.get(stage, 0.0) + seconds
+
+def call_timed(stage, fn, *args):
+    # For executor calls: runs fn in the worker and returns (result, {stage: seconds})
+    timings = {}
+    with timed(stage, timings):
+        result = fn(*args)
+    return result, timings
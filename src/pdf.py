@@ -0,0 +1,48 @@
+import os
+import tempfile
+import cv2
+import numpy as np
+
+POPPLER_PATH = os.getenv("POPPLER_PATH") or None  # poppler bin folder, only needed on Windows
+PDF_DPI = int(os.getenv("PDF_DPI", "150"))
+PDF_MAX_DPI = int(os.getenv("PDF_MAX_DPI", "300"))
+
+def clamp_dpi(dpi):
+    return max(36, min(int(dpi or PDF_DPI), PDF_MAX_DPI))
+
+# pdf2image (and PIL behind it) is only imported once a PDF is actually handled,
+# so servers that never see one don't pay for it at startup
+
+def page_count(pdf_path):
+    from pdf2image import pdfinfo_from_path
+    from pdf2image.exceptions import PDFPageCountError, PDFSyntaxError
+    try:
+        return pdfinfo_from_path(pdf_path, poppler_path=POPPLER_PATH)['Pages']
+    except (PDFPageCountError, PDFSyntaxError) as exc:
+        raise ValueError(f"Could not read PDF: {exc}")
+
+def render_page(pdf_path, page, dpi=PDF_DPI):
+    # pdftoppm writes the single page as PPM to stdout, so no image files are created;
+    # returns a BGR array like cv2.imread
+    from pdf2image import convert_from_path
+    pages = convert_from_path(pdf_path, dpi=dpi, first_page=page, last_page=page, poppler_path=POPPLER_PATH)
+    return cv2.cvtColor(np.asarray(pages[0]), cv2.COLOR_RGB2BGR)
+
+def iter_pages(pdf_path, dpi=PDF_DPI):
+    # Renders lazily, so only one page is held in memory at a time
+    for page in range(1, page_count(pdf_path) + 1):
+        yield page, render_page(pdf_path, page, dpi)
+
+def spool_pdf(data):
+    # poppler needs a file to seek in; spool the upload once instead of once per page
+    # (pdf2image's convert_from_bytes would rewrite it for every page)
+    f = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+    with f:
+        f.write(data)
+    return f.name
+
+def remove_spooled(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,84 @@
+import os
+from src.cache import make_key
+from src.engine import OCR_BACKEND, get_engine
+from src.metrics import timed
+from src.preprocess import BLUR_SIGMA, THRESHOLD, alternate_method, preprocess_adaptive, preprocess_legacy
+from src.textfilter import PREFILTER_PARAMS
+from src.textproc import clean_and_correct
+
+BOX_MARGIN = 10
+OCR_PREPROCESS = os.getenv("OCR_PREPROCESS", "adaptive").lower()  # adaptive | legacy
+# a second, differently binarised pass is only tried below this mean word confidence
+OCR_MIN_CONFIDENCE = float(os.getenv("OCR_MIN_CONFIDENCE", "60"))
+
+# Everything besides the pixels that changes OCR output; part of the OCR cache key
+OCR_PARAMS = {
+    'margin': BOX_MARGIN,
+    'preprocess': OCR_PREPROCESS,
+    'min_confidence': OCR_MIN_CONFIDENCE,
+    'blur_sigma': BLUR_SIGMA,
+    'threshold': THRESHOLD,
+    'backend': OCR_BACKEND,
+    'config': '--oem 1 --psm 6',
+    'prefilter': PREFILTER_PARAMS,
+}
+
+def ocr_cache_key(image_hash, box, batch=False, reduction=1):
+    coords = [int(box[k]) for k in ('x1', 'y1', 'x2', 'y2')]
+    return make_key('ocr', image_hash, coords, OCR_PARAMS, batch, reduction)
+
+def crop_box(img, box, margin=BOX_MARGIN, reduction=1):
+    # box coordinates are in full-resolution page pixels; img may be decoded reduced.
+    # Returns a view into img, not a copy
+    x1 = max(0, (int(box['x1']) - margin) // reduction)
+    y1 = max(0, (int(box['y1']) - margin) // reduction)
+    x2 = min(img.shape[1], -(-(int(box['x2']) + margin) // reduction))
+    y2 = min(img.shape[0], -(-(int(box['y2']) + margin) // reduction))
+    return img[y1:y2, x1:x2]
+
+def preprocess(crop, mode=None):
+    if (mode or OCR_PREPROCESS) == 'legacy':
+        return preprocess_legacy(crop)
+    return preprocess_adaptive(crop)[0]
+
+def mean_confidence(words):
+    return sum(w['conf'] for w in words) / len(words) if words else 0.0
+
+def ocr_crop_detailed(crop, mode=None, timings=None):
+    # Returns (raw text, mean word confidence or None, number of Tesseract calls);
+    # preprocess/tesseract seconds are added to timings when given
+    timings = {} if timings is None else timings
+    engine = get_engine()
+    if (mode or OCR_PREPROCESS) == 'legacy':
+        with timed('preprocess', timings):
+            thresh = preprocess_legacy(crop)
+        with timed('tesseract', timings):
+            return engine.image_to_string(thresh).strip(), None, 1
+    with timed('preprocess', timings):
+        thresh, method = preprocess_adaptive(crop)
+    with timed('tesseract', timings):
+        words = engine.image_to_data(thresh)
+    conf = mean_confidence(words)
+    calls = 1
+    if words and conf < OCR_MIN_CONFIDENCE:
+        with timed('preprocess', timings):
+            retry_thresh = preprocess_adaptive(crop, alternate_method(method))[0]
+        with timed('tesseract', timings):
+            retry_words = engine.image_to_data(retry_thresh)
+        calls += 1
+        retry_conf = mean_confidence(retry_words)
+        if retry_conf > conf:
+            words, conf = retry_words, retry_conf
+    return ' '.join(w['text'] for w in words), conf, calls
+
+def ocr_crop(crop, timings=None):
+    # Runs inside the OCR worker pool, so it must stay a picklable module-level function
+    timings = {} if timings is None else timings
+    text, _, _ = ocr_crop_detailed(crop, timings=timings)
+    with timed('spell', timings):
+        return clean_and_correct(text)
+
+def ocr_crop_timed(crop):
+    # (text, {stage: seconds}); timings travel back with the result from process workers
+    timings = {}
+    return ocr_crop(crop, timings), timings
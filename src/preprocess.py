@@ -0,0 +1,62 @@
+import os
+import cv2
+import numpy as np
+from src.imaging import to_gray
+
+# Per-crop preprocessing picked from cheap statistics of the crop instead of one
+# fixed recipe: dark fills are inverted, tiny crops upscaled, and the threshold
+# is Otsu for evenly lit crops and adaptive when the background varies.
+BLUR_SIGMA = 3
+THRESHOLD = 150
+MIN_TEXT_HEIGHT = int(os.getenv("OCR_MIN_CROP_HEIGHT", "48"))
+MAX_UPSCALE = 3.0
+DARK_FILL_LEVEL = 110     # median grey below this means a dark-filled shape
+UNEVEN_BACKGROUND_STD = 18.0
+
+def crop_stats(gray):
+    hist = np.bincount(gray.ravel(), minlength=256)
+    cdf = np.cumsum(hist)
+    total = cdf[-1]
+    p5, median, p95 = (int(np.searchsorted(cdf, total * q)) for q in (0.05, 0.5, 0.95))
+    # spread of a heavily blurred copy ~ how much the background itself varies
+    small = cv2.resize(gray, (16, 16), interpolation=cv2.INTER_AREA) if min(gray.shape) >= 16 else gray
+    return {
+        'p5': p5,
+        'median': median,
+        'p95': p95,
+        'contrast': p95 - p5,
+        'background_std': float(small.std()),
+        'height': gray.shape[0],
+    }
+
+def preprocess_legacy(crop):
+    gray = to_gray(crop)
+    sharpen = cv2.GaussianBlur(gray, (0, 0), BLUR_SIGMA)
+    sharpen = cv2.addWeighted(gray, 1.5, sharpen, -0.5, 0)
+    _, thresh = cv2.threshold(sharpen, THRESHOLD, 255, cv2.THRESH_BINARY)
+    return thresh
+
+def choose_method(stats):
+    return 'adaptive' if stats['background_std'] > UNEVEN_BACKGROUND_STD else 'otsu'
+
+def preprocess_adaptive(crop, method=None):
+    gray = to_gray(crop)
+    stats = crop_stats(gray)
+    if stats['median'] < DARK_FILL_LEVEL:
+        gray = cv2.bitwise_not(gray)  # light text on a dark fill -> dark text on light
+    if 0 < stats['height'] < MIN_TEXT_HEIGHT:
+        factor = min(MAX_UPSCALE, MIN_TEXT_HEIGHT / stats['height'])
+        gray = cv2.resize(gray, None, fx=factor, fy=factor, interpolation=cv2.INTER_CUBIC)
+    if stats['contrast'] < 64:
+        gray = cv2.normalize(gray, None, 0, 255, cv2.NORM_MINMAX)
+    method = method or choose_method(stats)
+    if method == 'adaptive':
+        block = max(15, (min(gray.shape[:2]) // 8) | 1)
+        thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block, 10)
+    else:
+        blurred = cv2.GaussianBlur(gray, (3, 3), 0)
+        _, thresh = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    return thresh, method
+
+def alternate_method(method):
+    return 'otsu' if method == 'adaptive' else 'adaptive'
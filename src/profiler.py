@@ -0,0 +1,45 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Stack-sampling profiler: every `interval` seconds it snapshots the stack of
+# every thread (event loop, OCR/detection pools, job workers) and counts
+# identical stacks. Cheap enough to run against production traffic.
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "0").lower() in ("1", "true", "yes")
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
+class ProfilerBusy(Exception):
+    pass
+
+_running = threading.Lock()
+
+def frame_stack(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+def sample_stacks(seconds, interval=0.005):
+    # Returns folded stacks ("thread;outer;...;inner count" per line)
+    if not _running.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already being taken")
+    try:
+        me = threading.get_ident()
+        names = {}
+        counts = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            frames = sys._current_frames()
+            if len(names) != len(frames):
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident != me:
+                    counts[f"{names.get(ident, ident)};{frame_stack(frame)}"] += 1
+            time.sleep(interval)
+        return ''.join(f"{stack} {count}\n" for stack, count in counts.most_common())
+    finally:
+        _running.release()
@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from src.cache import content_hash
+from src.imaging import decode_gray
+
+DOCUMENT_TTL = float(os.getenv("DOCUMENT_TTL", "1800"))  # seconds since last use
+DOCUMENT_STORE_SIZE = int(os.getenv("DOCUMENT_STORE_SIZE", "64"))
+DOCUMENT_STORE_MAX_MB = float(os.getenv("DOCUMENT_STORE_MAX_MB", "512"))
+
+class Document:
+    # An uploaded page kept server-side so follow-up edits only send boxes
+    def __init__(self, data):
+        self.id = uuid.uuid4().hex
+        self.data = data
+        self.hash = content_hash(data)
+        self.boxes = []
+        self.results = []
+        self.arrows = []
+        self.last_used = time.monotonic()
+        self._images = {}
+        self._lock = threading.Lock()
+
+    def image(self, reduction=1):
+        # decoded grayscale page, decoded at most once per reduction factor
+        with self._lock:
+            if reduction not in self._images:
+                self._images[reduction] = decode_gray(self.data, reduction)
+            return self._images[reduction]
+
+    @property
+    def nbytes(self):
+        return len(self.data) + sum(img.nbytes for img in self._images.values())
+
+    def state(self):
+        return {"document_id": self.id, "boxes": self.boxes, "results": self.results, "arrows": self.arrows}
+
+class DocumentStore:
+    # Bounded by count, total bytes and idle TTL; least recently used goes first
+    def __init__(self, max_documents=DOCUMENT_STORE_SIZE, ttl=DOCUMENT_TTL, max_bytes=DOCUMENT_STORE_MAX_MB * 1024 * 1024):
+        self.max_documents = max_documents
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._docs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, data):
+        doc = Document(data)
+        with self._lock:
+            self._docs[doc.id] = doc
+            self._evict()
+        return doc
+
+    def get(self, doc_id):
+        with self._lock:
+            self._evict()
+            doc = self._docs.get(doc_id)
+            if doc is not None:
+                doc.last_used = time.monotonic()
+                self._docs.move_to_end(doc_id)
+            return doc
+
+    def remove(self, doc_id):
+        with self._lock:
+            return self._docs.pop(doc_id, None) is not None
+
+    def _evict(self):
+        now = time.monotonic()
+        for doc_id in [d for d, doc in self._docs.items() if now - doc.last_used > self.ttl]:
+            del self._docs[doc_id]
+        total = sum(doc.nbytes for doc in self._docs.values())
+        while self._docs and (len(self._docs) > self.max_documents or total > self.max_bytes):
+            _, doc = self._docs.popitem(last=False)
+            total -= doc.nbytes
+
+    def stats(self):
+        with self._lock:
+            return {
+                "documents": len(self._docs),
+                "max_documents": self.max_documents,
+                "bytes": sum(doc.nbytes for doc in self._docs.values()),
+                "max_bytes": int(self.max_bytes),
+                "ttl": self.ttl,
+            }
+
+documents = DocumentStore()
@@ -0,0 +1,77 @@
+import cv2
+import numpy as np
+from src.spatial import GridIndex
+
+# Classical flowchart shape detection. Shapes are drawn as closed outlines, so
+# the interior of every shape shows up as a hole in the ink mask even when
+# connectors touch the outline; arrows are ink components without such a hole.
+MIN_SHAPE_AREA_RATIO = 0.0008  # of the page area
+MAX_SHAPE_AREA_RATIO = 0.5  # larger holes are page frames / swimlanes
+MIN_SHAPE_SIDE = 20
+MIN_ARROW_LENGTH = 30
+SHAPE_INDEX_CELL = 128  # px; grid cell for the arrow-inside-shape lookups
+
+def ink_mask(gray):
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    # close small gaps in scanned outlines so their interiors stay closed holes
+    return cv2.morphologyEx(mask, cv2.MORPH_CLOSE, np.ones((3, 3), np.uint8))
+
+def classify_shape(contour, w, h):
+    area = cv2.contourArea(contour)
+    fill = area / float(w * h) if w and h else 0.0
+    approx = cv2.approxPolyDP(contour, 0.03 * cv2.arcLength(contour, True), True)
+    if len(approx) == 4:
+        if fill > 0.8:
+            return 'rectangle'
+        if fill < 0.65:
+            return 'diamond'
+    if len(approx) > 6 and 0.68 <= fill <= 0.85:
+        return 'oval'
+    return 'shape'
+
+def detect_shapes(gray, min_area_ratio=MIN_SHAPE_AREA_RATIO):
+    mask = ink_mask(gray)
+    page_area = gray.shape[0] * gray.shape[1]
+    min_area = max(MIN_SHAPE_SIDE * MIN_SHAPE_SIDE, page_area * min_area_ratio)
+    max_area = page_area * MAX_SHAPE_AREA_RATIO
+    contours, hierarchy = cv2.findContours(mask, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE)
+    if hierarchy is None:
+        return []
+    hierarchy = hierarchy[0]
+
+    boxes = []
+    outer_with_shape = set()
+    for i, contour in enumerate(contours):
+        parent = hierarchy[i][3]
+        if parent == -1:
+            continue
+        x, y, w, h = cv2.boundingRect(contour)
+        if w < MIN_SHAPE_SIDE or h < MIN_SHAPE_SIDE or not min_area <= w * h <= max_area:
+            continue
+        outer_with_shape.add(parent)
+        # the hole is the inside of the outline; grow by a stroke to cover the line itself
+        pad = 2
+        boxes.append({
+            "x1": max(0, x - pad), "y1": max(0, y - pad),
+            "x2": min(gray.shape[1], x + w + pad), "y2": min(gray.shape[0], y + h + pad),
+            "label": classify_shape(contour, w, h),
+        })
+
+    # only the shapes around a candidate are tested, not every shape on the page
+    shapes = GridIndex(cell_size=SHAPE_INDEX_CELL)
+    for n, b in enumerate(boxes):
+        shapes.insert(n, b["x1"], b["y1"], b["x2"], b["y2"])
+    for i, contour in enumerate(contours):
+        if hierarchy[i][3] != -1 or i in outer_with_shape:
+            continue
+        x, y, w, h = cv2.boundingRect(contour)
+        if max(w, h) < MIN_ARROW_LENGTH:
+            continue
+        # a shape containing the component contains its top-left corner
+        if any(x + w <= shapes.rects[n][2] and y + h <= shapes.rects[n][3] for n in shapes.query_point(x, y)):
+            continue  # text or decoration inside a shape
+        # thin, mostly-empty components are connectors rather than text blobs
+        fill = cv2.contourArea(contour) / float(w * h)
+        if max(w, h) >= 3 * min(w, h) or fill < 0.2:
+            boxes.append({"x1": x, "y1": y, "x2": x + w, "y2": y + h, "label": "arrow"})
+    return boxes
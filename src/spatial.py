@@ -0,0 +1,78 @@
+from collections import defaultdict
+from math import floor, hypot
+
+class GridIndex:
+    # Uniform grid over axis-aligned rectangles. Each item is registered in every
+    # cell its rectangle overlaps, so queries only look at items near the query
+    # area instead of scanning everything. Pure Python, also used by the editor.
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = defaultdict(set)
+        self.rects = {}
+
+    def _cell_range(self, x1, y1, x2, y2):
+        cs = self.cell_size
+        for cx in range(floor(min(x1, x2) / cs), floor(max(x1, x2) / cs) + 1):
+            for cy in range(floor(min(y1, y2) / cs), floor(max(y1, y2) / cs) + 1):
+                yield cx, cy
+
+    def insert(self, item, x1, y1, x2, y2):
+        if item in self.rects:
+            self.remove(item)
+        rect = (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+        self.rects[item] = rect
+        for cell in self._cell_range(*rect):
+            self.cells[cell].add(item)
+
+    def remove(self, item):
+        rect = self.rects.pop(item, None)
+        if rect is None:
+            return
+        for cell in self._cell_range(*rect):
+            bucket = self.cells.get(cell)
+            if bucket is not None:
+                bucket.discard(item)
+                if not bucket:
+                    del self.cells[cell]
+
+    def clear(self):
+        self.cells.clear()
+        self.rects.clear()
+
+    def __len__(self):
+        return len(self.rects)
+
+    def __contains__(self, item):
+        return item in self.rects
+
+    def query_rect(self, x1, y1, x2, y2):
+        # items whose rectangle intersects the query rectangle
+        qx1, qy1, qx2, qy2 = min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)
+        found = set()
+        for cell in self._cell_range(qx1, qy1, qx2, qy2):
+            for item in self.cells.get(cell, ()):
+                if item in found:
+                    continue
+                rx1, ry1, rx2, ry2 = self.rects[item]
+                if rx1 <= qx2 and qx1 <= rx2 and ry1 <= qy2 and qy1 <= ry2:
+                    found.add(item)
+        return found
+
+    def query_point(self, x, y, radius=0):
+        return self.query_rect(x - radius, y - radius, x + radius, y + radius)
+
+    def nearest(self, x, y, max_dist):
+        # item whose rectangle is closest to (x, y), within max_dist; None if nothing is near
+        best, best_dist = None, None
+        for item in self.query_point(x, y, max_dist):
+            dist = rect_distance(x, y, self.rects[item])
+            if dist <= max_dist and (best_dist is None or dist < best_dist):
+                best, best_dist = item, dist
+        return best
+
+def rect_distance(x, y, rect):
+    # 0 inside the rectangle, otherwise distance to its nearest edge
+    x1, y1, x2, y2 = rect
+    dx = max(x1 - x, 0, x - x2)
+    dy = max(y1 - y, 0, y - y2)
+    return hypot(dx, dy)
@@ -0,0 +1,73 @@
+import os
+import cv2
+import numpy as np
+from src.imaging import to_gray
+from src.preprocess import DARK_FILL_LEVEL
+
+# Cheap check run before Tesseract: boxes whose label marks them as connectors,
+# and crops with no glyph-like ink inside the shape, are answered with '' and
+# never reach the OCR engine. Errs towards 'text': anything unclear is OCR'd.
+OCR_PREFILTER = os.getenv("OCR_PREFILTER", "1").lower() in ("1", "true", "yes")
+NON_TEXT_LABELS = frozenset(
+    label.strip().lower() for label in os.getenv("OCR_NON_TEXT_LABELS", "arrow,line,connector,arrowhead").split(',')
+    if label.strip())
+INK_CONTRAST = 50  # grey levels darker than the crop's background to count as ink
+MIN_GLYPH_HEIGHT = 3
+MIN_GLYPH_AREA = 4  # px; smaller components are scan speckle
+FRAME_RATIO = 0.9  # a component this close to the box size in both directions is the outline
+
+# Only these params change which boxes are skipped; part of the OCR cache key
+PREFILTER_PARAMS = {
+    'enabled': OCR_PREFILTER,
+    'contrast': INK_CONTRAST,
+    'glyph': (MIN_GLYPH_HEIGHT, MIN_GLYPH_AREA),
+    'frame': FRAME_RATIO,
+}
+
+def is_non_text(box):
+    return str(box.get('label', '')).lower() in NON_TEXT_LABELS
+
+def has_text_ink(crop, margin=0):
+    # margin: padding crop_box added around the box, so the outline sits that far in
+    gray = to_gray(crop)
+    if gray.size == 0:
+        return False
+    background = int(np.median(gray))
+    if background < DARK_FILL_LEVEL:
+        gray, background = 255 - gray, 255 - background  # light text on a dark fill
+    ink = (gray < background - INK_CONTRAST).astype(np.uint8)
+    if not ink.any():
+        return False
+    _, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    x, y, w, h, area = stats[1:].T
+    height, width = gray.shape
+    inner_w, inner_h = max(1, width - 2 * margin), max(1, height - 2 * margin)
+    touches = (x == 0) | (y == 0) | (x + w >= width) | (y + h >= height)  # connectors leaving the crop
+    frame = (w >= FRAME_RATIO * inner_w) & (h >= FRAME_RATIO * inner_h)
+    glyphs = ~touches & ~frame & (h >= MIN_GLYPH_HEIGHT) & (area >= MIN_GLYPH_AREA)
+    if glyphs.any():
+        return True
+    # Text drawn touching the outline merges into its component; an outline or a
+    # connector alone leaves the middle of the shape (even of a diamond) clear
+    top, left = margin + int(0.3 * inner_h), margin + int(0.3 * inner_w)
+    middle = ink[top:margin + int(0.7 * inner_h) + 1, left:margin + int(0.7 * inner_w) + 1]
+    return np.count_nonzero(middle) >= MIN_GLYPH_AREA
+
+def classify_crop(crop, box=None, margin=0):
+    # -> 'text', 'empty' or 'non_text'
+    if not OCR_PREFILTER:
+        return 'text'
+    if box is not None and is_non_text(box):
+        return 'non_text'
+    return 'text' if has_text_ink(crop, margin) else 'empty'
+
+def classify_crops(crops, margin=0):
+    # for executor calls; labels are checked before the crops are cut
+    return [classify_crop(crop, margin=margin) for crop in crops]
+
+def count_skipped(kinds, skipped=None):
+    skipped = {'empty': 0, 'non_text': 0} if skipped is None else skipped
+    for kind in kinds:
+        if kind != 'text':
+            skipped[kind] = skipped.get(kind, 0) + 1
+    return skipped
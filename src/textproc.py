@@ -0,0 +1,50 @@
+import os
+import re
+from functools import lru_cache
+from spellchecker import SpellChecker
+
+SPELL_CACHE_SIZE = int(os.getenv("SPELL_CACHE_SIZE", "4096"))
+# optional newline-separated list of domain words (e.g. "KYC", "Onboarding")
+SPELL_VOCAB_FILE = os.getenv("SPELL_VOCAB_FILE")
+
+NON_PRINTABLE_RE = re.compile(r'[^\x20-\x7E\n]')
+WHITESPACE_RE = re.compile(r'\s+')
+DISALLOWED_RE = re.compile(r'[^\w\s\n•\-•\*\.\,]')
+
+spell = SpellChecker()
+
+def load_vocabulary(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        words = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    spell.word_frequency.load_words(words)
+    correct_word.cache_clear()
+    return words
+
+def is_known(word):
+    # Plain dict lookup; avoids building edit-distance candidates for correct words
+    return word.lower() in spell.word_frequency.dictionary
+
+@lru_cache(maxsize=SPELL_CACHE_SIZE)
+def correct_word(word):
+    corr = spell.correction(word)
+    return corr if corr is not None else word
+
+def correct_words(words):
+    # Each distinct unknown word is corrected once per call, and once per process via the cache
+    corrections = {}
+    for word in set(words):
+        if word.isalpha() and not is_known(word):
+            corrections[word] = correct_word(word)
+    return [corrections.get(word, word) for word in words]
+
+def clean_and_correct(text):
+    text = NON_PRINTABLE_RE.sub('', text)
+    text = WHITESPACE_RE.sub(' ', text)
+    text = DISALLOWED_RE.sub('', text)
+    return '\n'.join(' '.join(correct_words(line.split())) for line in text.split('\n'))
+
+def correction_cache_info():
+    return correct_word.cache_info()
+
+if SPELL_VOCAB_FILE:
+    load_vocabulary(SPELL_VOCAB_FILE)
@@ -0,0 +1,155 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from src.imaging import decode_image, image_size, to_gray
+
+# Detection on oversized scans. A downscaled copy of the page finds the large
+# shapes cheaply; above DETECT_TILE_THRESHOLD the page is also cut into
+# overlapping full-resolution tiles (detected concurrently) so small shapes are
+# not lost to the model's own resize. Boxes are mapped back to page coordinates
+# and duplicates merged with non-max suppression.
+DETECT_COARSE_MAX_SIDE = int(os.getenv("DETECT_COARSE_MAX_SIDE", "1600"))
+DETECT_TILE_THRESHOLD = int(os.getenv("DETECT_TILE_THRESHOLD", "4000"))  # longest side, px
+DETECT_TILE_SIZE = int(os.getenv("DETECT_TILE_SIZE", "1280"))
+DETECT_TILE_OVERLAP = int(os.getenv("DETECT_TILE_OVERLAP", "256"))
+DETECT_TILE_WORKERS = int(os.getenv("DETECT_TILE_WORKERS", "4"))
+DETECT_MERGE_IOU = float(os.getenv("DETECT_MERGE_IOU", "0.5"))
+DETECT_TILED = os.getenv("DETECT_TILED", "0").lower() in ("1", "true", "yes")  # default for /cvmodel
+TILE_MIN_INK = 50  # dark pixels; emptier tiles are not sent to the detector
+EDGE_MARGIN = 2  # px; boxes this close to an inner tile edge were cut by it
+
+def tile_starts(length, tile, overlap):
+    if length <= tile:
+        return [0]
+    step = max(1, tile - overlap)
+    starts = list(range(0, length - tile, step))
+    starts.append(length - tile)  # last tile flush with the edge, never past it
+    return starts
+
+def plan_tiles(width, height, tile=DETECT_TILE_SIZE, overlap=DETECT_TILE_OVERLAP):
+    return [(x, y, min(width, x + tile), min(height, y + tile))
+            for y in tile_starts(height, tile, overlap)
+            for x in tile_starts(width, tile, overlap)]
+
+def downscale(img, max_side=DETECT_COARSE_MAX_SIDE):
+    # -> (image, factor) with factor = original / downscaled size
+    h, w = img.shape[:2]
+    factor = max(h, w) / float(max_side)
+    if factor <= 1:
+        return img, 1.0
+    size = (max(1, round(w / factor)), max(1, round(h / factor)))
+    return cv2.resize(img, size, interpolation=cv2.INTER_AREA), factor
+
+def merge_boxes(boxes, iou_threshold=DETECT_MERGE_IOU, priority=None):
+    # Greedy NMS, label-agnostic: the same shape seen by two passes may be labelled
+    # differently. Higher priority wins first, then the larger box.
+    if len(boxes) < 2:
+        return list(boxes)
+    coords = np.array([[b['x1'], b['y1'], b['x2'], b['y2']] for b in boxes], dtype=np.float64)
+    x1, y1, x2, y2 = coords.T
+    areas = np.maximum(0.0, x2 - x1) * np.maximum(0.0, y2 - y1)
+    priority = np.zeros(len(boxes)) if priority is None else np.asarray(priority, dtype=np.float64)
+    order = np.lexsort((-areas, -priority))
+    keep = []
+    while order.size:
+        i, rest = order[0], order[1:]
+        keep.append(i)
+        iw = np.maximum(0.0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]))
+        ih = np.maximum(0.0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]))
+        inter = iw * ih
+        union = areas[i] + areas[rest] - inter
+        iou = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+        order = rest[iou < iou_threshold]
+    return [boxes[i] for i in sorted(keep)]
+
+def place_boxes(boxes, dx=0, dy=0, factor=1.0, width=None, height=None):
+    placed = []
+    for b in boxes:
+        box = dict(b, x1=int(b['x1'] * factor + dx), y1=int(b['y1'] * factor + dy),
+                   x2=int(round(b['x2'] * factor + dx)), y2=int(round(b['y2'] * factor + dy)))
+        if width is not None:
+            box['x1'], box['x2'] = max(0, box['x1']), min(width, box['x2'])
+        if height is not None:
+            box['y1'], box['y2'] = max(0, box['y1']), min(height, box['y2'])
+        placed.append(box)
+    return placed
+
+def cut_by_tile(box, rect, width, height, margin=EDGE_MARGIN):
+    # touching a tile edge that is not also a page edge: the shape continues in a
+    # neighbouring tile (or is large enough for the coarse pass), so drop this piece
+    x1, y1, x2, y2 = rect
+    return ((x1 > 0 and box['x1'] <= x1 + margin) or (y1 > 0 and box['y1'] <= y1 + margin) or
+            (x2 < width and box['x2'] >= x2 - margin) or (y2 < height and box['y2'] >= y2 - margin))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_tile_pool():
+    # separate from the app's detection pool, whose threads block on these tiles
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=DETECT_TILE_WORKERS, thread_name_prefix='detect-tile')
+        return _pool
+
+def shutdown_tile_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+class TiledDetector:
+    # Wraps any detector from src.detect; same detect/detect_image interface
+    def __init__(self, detector, coarse_max_side=DETECT_COARSE_MAX_SIDE, tile_threshold=DETECT_TILE_THRESHOLD,
+                 tile_size=DETECT_TILE_SIZE, overlap=DETECT_TILE_OVERLAP, iou_threshold=DETECT_MERGE_IOU):
+        self.detector = detector
+        self.name = f"{detector.name}_tiled"
+        self.coarse_max_side = coarse_max_side
+        self.tile_threshold = tile_threshold
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.iou_threshold = iou_threshold
+        # part of the detection cache key: different settings give different boxes
+        self.model_id = (f"{detector.model_id}:tiled-{coarse_max_side}-{tile_threshold}-"
+                         f"{tile_size}-{overlap}-{iou_threshold}")
+
+    def detect(self, image_bytes):
+        size = image_size(image_bytes)
+        if size is not None and max(size) <= self.coarse_max_side:
+            # small enough already: the original upload is the cheapest thing to send, undecoded
+            return self.detector.detect(image_bytes)
+        return self.detect_image(decode_image(image_bytes))
+
+    def detect_image(self, img):
+        h, w = img.shape[:2]
+        if max(h, w) <= self.coarse_max_side:
+            return self.detector.detect_image(img)
+        pool = get_tile_pool()
+        small, factor = downscale(img, self.coarse_max_side)
+        coarse = pool.submit(self.detector.detect_image, small)
+        tiles = []
+        if max(h, w) > self.tile_threshold:
+            gray = to_gray(img)
+            for rect in plan_tiles(w, h, self.tile_size, self.overlap):
+                x1, y1, x2, y2 = rect
+                if np.count_nonzero(gray[y1:y2, x1:x2] < 128) < TILE_MIN_INK:
+                    continue
+                # a view, not a copy; detectors encode or read it without writing
+                tiles.append((rect, pool.submit(self.detector.detect_image, img[y1:y2, x1:x2])))
+
+        try:
+            boxes = place_boxes(coarse.result(), factor=factor, width=w, height=h)
+            priority = [0] * len(boxes)
+            for rect, future in tiles:
+                for box in place_boxes(future.result(), dx=rect[0], dy=rect[1]):
+                    if not cut_by_tile(box, rect, w, h):
+                        boxes.append(box)
+                        priority.append(1)  # full-resolution boxes are tighter than rescaled coarse ones
+        except BaseException:
+            for _, future in tiles:
+                future.cancel()
+            raise
+        return merge_boxes(boxes, self.iou_threshold, priority)
@@ -1,9 +1,17 @@
 import cv2
 import json
+import os
+import sys
 import tkinter as tk
+from collections import defaultdict
 from tkinter import simpledialog
 from PIL import Image, ImageTk
 
+if not __package__:
+    # run as `python src/vizedit.py`: make the repo root importable for src.*
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.spatial import GridIndex
+
 image_path = r'data/images/v1/flowchart_page_3.png'
 json_path = r'data/jsonf/flowchart_page_3_roboflow.json'
 
@@ -21,6 +29,8 @@ new_w, new_h = int(w * scale), int(h * scale)
 img_resized = cv2.resize(img_rgb, (new_w, new_h))
 img_pil = Image.fromarray(img_resized)
 
+HIT_TOLERANCE = 10  # pixels around an arrow line that still count as a click on it
+
 class BoxEditor(tk.Tk):
     def __init__(self, img_pil, predictions, scale):
         super().__init__()
@@ -31,9 +41,14 @@ class BoxEditor(tk.Tk):
         self.canvas.create_image(0, 0, anchor=tk.NW, image=self.img_tk)
         self.predictions = predictions
         self.scale = scale
-        self.box_items = []
         self.arrows = data.get('arrows', [])
-        self.arrow_items = []
+        # Canvas items and grid indexes are kept per box/arrow and updated one at a
+        # time, so clicks and edits don't scan or redraw the whole diagram
+        self.box_items = {}  # prediction index -> (rectangle, label)
+        self.arrow_items = {}  # arrow index -> (line, (x1, y1, x2, y2))
+        self.box_index = GridIndex(cell_size=64)
+        self.arrow_index = GridIndex(cell_size=64)
+        self.arrows_by_box = defaultdict(set)
 
         # Shape count label (move this up!)
         self.shape_count_label = tk.Label(self, text="")
@@ -108,41 +123,91 @@ class BoxEditor(tk.Tk):
         count = len([p for p in self.predictions if not p.get('deleted')])
         self.shape_count_label.config(text=f"Shapes: {count}")
 
+    def box_coords(self, pred):
+        x1 = int((pred['x'] - pred['width'] / 2) * self.scale)
+        y1 = int((pred['y'] - pred['height'] / 2) * self.scale)
+        x2 = int((pred['x'] + pred['width'] / 2) * self.scale)
+        y2 = int((pred['y'] + pred['height'] / 2) * self.scale)
+        return x1, y1, x2, y2
+
+    def box_color(self, idx):
+        return "red" if 'arrow' in self.predictions[idx]['class'] else "green"
+
+    def draw_box(self, idx):
+        x1, y1, x2, y2 = self.box_coords(self.predictions[idx])
+        color = self.box_color(idx)
+        box = self.canvas.create_rectangle(x1, y1, x2, y2, outline=color, width=2)
+        label = self.canvas.create_text(x1+5, y1+15, anchor=tk.NW, text=self.predictions[idx]['class'], fill=color)
+        self.box_items[idx] = (box, label)
+        self.box_index.insert(idx, x1, y1, x2, y2)
+
+    def erase_box(self, idx):
+        box, label = self.box_items.pop(idx)
+        self.canvas.delete(box)
+        self.canvas.delete(label)
+        self.box_index.remove(idx)
+
     def draw_boxes(self):
-        self.canvas.delete("all")  # Clear all items from canvas
-        self.canvas.create_image(0, 0, anchor=tk.NW, image=self.img_tk)  # Redraw background
-        self.box_items.clear()
-        for i, pred in enumerate(self.predictions):
-            if pred.get('deleted'):
-                continue
-            x1 = int((pred['x'] - pred['width'] / 2) * self.scale)
-            y1 = int((pred['y'] - pred['height'] / 2) * self.scale)
-            x2 = int((pred['x'] + pred['width'] / 2) * self.scale)
-            y2 = int((pred['y'] + pred['height'] / 2) * self.scale)
-            color = "red" if 'arrow' in pred['class'] else "green"
-            box = self.canvas.create_rectangle(x1, y1, x2, y2, outline=color, width=2)
-            label = self.canvas.create_text(x1+5, y1+15, anchor=tk.NW, text=pred['class'], fill=color)
-            self.box_items.append((box, label, i))
+        for idx, pred in enumerate(self.predictions):
+            if not pred.get('deleted') and idx not in self.box_items:
+                self.draw_box(idx)
         self.update_shape_count()
 
+    def arrow_coords(self, arrow):
+        start_idx, end_idx = arrow['from'], arrow['to']
+        if start_idx >= len(self.predictions) or end_idx >= len(self.predictions):
+            return None
+        start_pred = self.predictions[start_idx]
+        end_pred = self.predictions[end_idx]
+        if start_pred.get('deleted') or end_pred.get('deleted'):
+            return None
+        return (int(start_pred['x'] * self.scale), int(start_pred['y'] * self.scale),
+                int(end_pred['x'] * self.scale), int(end_pred['y'] * self.scale))
+
+    def draw_arrow(self, idx):
+        arrow = self.arrows[idx]
+        coords = self.arrow_coords(arrow) if arrow is not None else None
+        if coords is None:
+            return
+        item = self.canvas.create_line(*coords, arrow=tk.LAST, fill="blue", width=2)
+        self.arrow_items[idx] = (item, coords)
+        self.arrow_index.insert(idx, *coords)
+        self.arrows_by_box[arrow['from']].add(idx)
+        self.arrows_by_box[arrow['to']].add(idx)
+
+    def erase_arrow(self, idx):
+        item, _ = self.arrow_items.pop(idx)
+        self.canvas.delete(item)
+        self.arrow_index.remove(idx)
+        arrow = self.arrows[idx]
+        self.arrows_by_box[arrow['from']].discard(idx)
+        self.arrows_by_box[arrow['to']].discard(idx)
+
+    def move_arrow(self, idx):
+        # follow a resized box; the line keeps its canvas item
+        item, _ = self.arrow_items[idx]
+        coords = self.arrow_coords(self.arrows[idx])
+        self.canvas.coords(item, *coords)
+        self.arrow_items[idx] = (item, coords)
+        self.arrow_index.insert(idx, *coords)
+
     def draw_arrows(self):
-        for arrow in self.arrow_items:
-            self.canvas.delete(arrow)
-        self.arrow_items.clear()
-        for idx, arrow in enumerate(self.arrows):
-            start_idx, end_idx = arrow['from'], arrow['to']
-            if start_idx >= len(self.predictions) or end_idx >= len(self.predictions):
-                continue
-            start_pred = self.predictions[start_idx]
-            end_pred = self.predictions[end_idx]
-            if start_pred.get('deleted') or end_pred.get('deleted'):
-                continue
-            x1 = int(start_pred['x'] * self.scale)
-            y1 = int(start_pred['y'] * self.scale)
-            x2 = int(end_pred['x'] * self.scale)
-            y2 = int(end_pred['y'] * self.scale)
-            arrow_item = self.canvas.create_line(x1, y1, x2, y2, arrow=tk.LAST, fill="blue", width=2)
-            self.arrow_items.append((arrow_item, (x1, y1, x2, y2), idx))
+        for idx in range(len(self.arrows)):
+            if idx not in self.arrow_items:
+                self.draw_arrow(idx)
+
+    def box_at(self, x, y):
+        # lowest index wins, like the original front-to-back scan
+        hits = self.box_index.query_point(x, y)
+        return min(hits) if hits else None
+
+    def arrow_at(self, x, y):
+        best, best_dist = None, HIT_TOLERANCE
+        for idx in self.arrow_index.query_point(x, y, HIT_TOLERANCE):
+            dist = self._point_line_distance(x, y, *self.arrow_items[idx][1])
+            if dist < best_dist:
+                best, best_dist = idx, dist
+        return best
 
     def on_click(self, event):
         if self.adding_box:
@@ -168,60 +233,52 @@ class BoxEditor(tk.Tk):
                     "class": ""
                 }
                 self.predictions.append(new_pred)
-                self.draw_boxes()
-                self.draw_arrows()
+                self.draw_box(len(self.predictions) - 1)
+                self.update_shape_count()
                 self.adding_box = False
                 self.start_x = self.start_y = None
                 self.temp_box = None
         elif self.resizing_box:
-            for box, label, idx in self.box_items:
+            idx = self.box_at(event.x, event.y)
+            if idx is not None:
+                box, label = self.box_items[idx]
                 coords = self.canvas.coords(box)
-                if coords[0] <= event.x <= coords[2] and coords[1] <= event.y <= coords[3]:
-                    self.selected_box_idx = idx
-                    self.selected_box = box
-                    self.selected_label = label
-                    corners = [(coords[0], coords[1]), (coords[2], coords[1]), (coords[2], coords[3]), (coords[0], coords[3])]
-                    dists = [((event.x-x)**2 + (event.y-y)**2) for x, y in corners]
-                    self.resizing_corner = dists.index(min(dists))
-                    self.canvas.bind("<B1-Motion>", self.on_drag_resize_box)
-                    break
+                self.selected_box_idx = idx
+                self.selected_box = box
+                self.selected_label = label
+                corners = [(coords[0], coords[1]), (coords[2], coords[1]), (coords[2], coords[3]), (coords[0], coords[3])]
+                dists = [((event.x-x)**2 + (event.y-y)**2) for x, y in corners]
+                self.resizing_corner = dists.index(min(dists))
+                self.canvas.bind("<B1-Motion>", self.on_drag_resize_box)
         elif self.removing_box:
-            for box, label, idx in list(self.box_items):
-                coords = self.canvas.coords(box)
-                if coords[0] <= event.x <= coords[2] and coords[1] <= event.y <= coords[3]:
-                    self.predictions[idx]['deleted'] = True
-                    # Just redraw everything; don't manually remove from box_items
-                    self.draw_boxes()
-                    self.draw_arrows()
-                    self.update_shape_count()
-                    break
+            idx = self.box_at(event.x, event.y)
+            if idx is not None:
+                self.predictions[idx]['deleted'] = True
+                self.erase_box(idx)
+                # arrows to or from a removed box are hidden, as before
+                for arrow_idx in list(self.arrows_by_box[idx]):
+                    self.erase_arrow(arrow_idx)
+                self.update_shape_count()
         elif self.adding_arrow:
             # Select start and end shapes for arrow
-            for box, label, idx in self.box_items:
-                coords = self.canvas.coords(box)
-                if coords[0] <= event.x <= coords[2] and coords[1] <= event.y <= coords[3]:
-                    if self.arrow_start_idx is None:
-                        self.arrow_start_idx = idx
-                        self.canvas.itemconfig(box, outline="blue")
-                    else:
-                        arrow = {"from": self.arrow_start_idx, "to": idx}
-                        self.arrows.append(arrow)
-                        self.arrow_start_idx = None
-                        self.draw_arrows()  # Only redraw arrows
-                        # Do NOT call self.draw_boxes() here
-                    break
+            idx = self.box_at(event.x, event.y)
+            if idx is not None:
+                if self.arrow_start_idx is None:
+                    self.arrow_start_idx = idx
+                    self.canvas.itemconfig(self.box_items[idx][0], outline="blue")
+                else:
+                    start_idx = self.arrow_start_idx
+                    self.arrows.append({"from": start_idx, "to": idx})
+                    self.arrow_start_idx = None
+                    self.canvas.itemconfig(self.box_items[start_idx][0], outline=self.box_color(start_idx))
+                    self.draw_arrow(len(self.arrows) - 1)
         elif self.removing_arrow:
             # Remove arrow if clicked near it
-            for arrow_item, coords, idx in list(self.arrow_items):
-                x1, y1, x2, y2 = coords
-                # Calculate distance from click to line segment
-                px, py = event.x, event.y
-                dist = self._point_line_distance(px, py, x1, y1, x2, y2)
-                if dist < 10:  # threshold in pixels
-                    self.canvas.delete(arrow_item)
-                    self.arrows.pop(idx)
-                    self.draw_arrows()
-                    break
+            idx = self.arrow_at(event.x, event.y)
+            if idx is not None:
+                self.erase_arrow(idx)
+                # leave a hole so the indices of the other arrows stay valid; dropped on save
+                self.arrows[idx] = None
 
     def on_drag_add_box(self, event):
         if self.temp_box and self.start_x is not None and self.start_y is not None:
@@ -300,6 +357,9 @@ class BoxEditor(tk.Tk):
                 self.predictions[self.selected_box_idx]['y'] = cy
                 self.predictions[self.selected_box_idx]['width'] = w_box
                 self.predictions[self.selected_box_idx]['height'] = h_box
+                self.box_index.insert(self.selected_box_idx, x1, y1, x2, y2)
+                for arrow_idx in self.arrows_by_box[self.selected_box_idx]:
+                    self.move_arrow(arrow_idx)
             else:
                 self.selected_box = None
                 self.selected_label = None
@@ -308,10 +368,17 @@ class BoxEditor(tk.Tk):
                 self.canvas.unbind("<B1-Motion>")
 
     def save_json(self):
-        filtered = [p for p in self.predictions if not p.get('deleted')]
+        # arrows index predictions by position, so they are renumbered to match the
+        # filtered list; arrows to or from a deleted box are dropped with it
+        kept = [i for i, p in enumerate(self.predictions) if not p.get('deleted')]
+        new_index = {old: new for new, old in enumerate(kept)}
         data_out = dict(data)
-        data_out['predictions'] = filtered
-        data_out['arrows'] = self.arrows
+        data_out['predictions'] = [self.predictions[i] for i in kept]
+        data_out['arrows'] = [
+            dict(a, **{'from': new_index[a['from']], 'to': new_index[a['to']]})
+            for a in self.arrows
+            if a is not None and a['from'] in new_index and a['to'] in new_index
+        ]
         with open(json_path.replace('.json', '_edited.json'), 'w', encoding='utf-8') as f:
             json.dump(data_out, f, indent=2)
         print("Saved edited JSON!")
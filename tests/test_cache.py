@@ -0,0 +1,25 @@
+import os
+from src.cache import ResultCache
+
+def test_disk_tier_survives_a_new_cache(tmp_path):
+    ResultCache('ocr', 4, str(tmp_path)).set_many([('ab12', 'Start'), ('cd34', '')])
+    cache = ResultCache('ocr', 4, str(tmp_path))
+    assert cache.get_many(['ab12', 'cd34', 'ef56']) == ['Start', '', None]
+    assert cache.stats()['disk_hits'] == 2
+
+def test_corrupt_file_is_a_miss(tmp_path):
+    cache = ResultCache('ocr', 4, str(tmp_path))
+    cache.set('ab12', 'Start')
+    with open(cache._path('ab12'), 'w', encoding='utf-8') as f:
+        f.write('"Sta')
+    cache.clear()
+    assert cache.get('ab12') is None
+
+def test_failed_write_keeps_memory_and_leaves_no_tmp(tmp_path):
+    cache = ResultCache('ocr', 4, str(tmp_path))
+    # a file where the key's subdirectory should be makes the write fail
+    with open(os.path.join(cache.disk_dir, 'ab'), 'w') as f:
+        f.write('')
+    cache.set('ab12', 'Start')
+    assert cache.get('ab12') == 'Start'
+    assert os.listdir(cache.disk_dir) == ['ab']
@@ -0,0 +1,80 @@
+import json
+import pytest
+from src.graph import FlowGraph, export_graph, node_id, to_columnar, to_dot, to_mermaid, to_ndjson
+
+def item(x, y, text, label='rectangle', **extra):
+    return {'box': {'x1': x, 'y1': y, 'x2': x + 100, 'y2': y + 40, 'label': label, **extra}, 'ocr_text': text}
+
+def edge(a, b):
+    return {'from': a, 'to': b}
+
+def texts(graph, ids):
+    return [graph.nodes[nid]['text'] for nid in ids]
+
+def test_node_ids_are_stable_under_reordering():
+    results = [item(0, 0, 'Start'), item(0, 100, 'End')]
+    forward = FlowGraph(results, [edge(0, 1)])
+    backward = FlowGraph(results[::-1], [edge(1, 0)])
+    assert set(forward.nodes) == set(backward.nodes)
+    assert forward.edges == backward.edges
+
+def test_client_id_wins():
+    assert node_id({'id': 7, 'x1': 0, 'y1': 0, 'x2': 1, 'y2': 1}) == '7'
+    assert node_id({'id': '', 'x1': 0, 'y1': 0, 'x2': 1, 'y2': 1}).startswith('n')
+
+def test_identical_boxes_get_distinct_ids():
+    graph = FlowGraph([item(0, 0, 'a'), item(0, 0, 'b'), item(0, 0, 'c')], [edge(0, 1)])
+    ids = list(graph.nodes)
+    assert len(ids) == 3
+    assert ids[1] == ids[0] + '_2' and ids[2] == ids[0] + '_3'
+    assert graph.edges == [{'from': ids[0], 'to': ids[1]}]
+
+def test_invalid_and_duplicate_arrows_are_dropped():
+    graph = FlowGraph([item(0, 0, 'a'), item(0, 100, 'b')],
+                      [edge(0, 1), edge(0, 1), None, edge(0, 5), edge(-1, 0), {'from': '0', 'to': 1}])
+    assert len(graph.edges) == 1
+
+def test_start_nodes_in_reading_order():
+    results = [item(300, 0, 'B start'), item(0, 0, 'A start'), item(150, 100, 'Join'), item(0, 400, 'Lonely')]
+    graph = FlowGraph(results, [edge(0, 2), edge(1, 2)])
+    assert texts(graph, graph.start_nodes()) == ['A start', 'B start']
+
+def test_cycle_starts_at_first_node():
+    results = [item(0, 100, 'second'), item(0, 0, 'first')]
+    graph = FlowGraph(results, [edge(0, 1), edge(1, 0)])
+    assert texts(graph, graph.start_nodes()) == ['first']
+
+def test_steps_breadth_first_with_branches_in_reading_order():
+    results = [item(0, 0, 'Start'), item(0, 100, 'Check', 'diamond'), item(200, 200, 'No'),
+               item(0, 200, 'Yes'), item(0, 300, 'End')]
+    graph = FlowGraph(results, [edge(0, 1), edge(1, 2), edge(1, 3), edge(3, 4), edge(2, 4)])
+    steps = graph.steps()
+    assert [s['text'] for s in steps] == ['Start', 'Check', 'Yes', 'No', 'End']
+    assert [s['step'] for s in steps] == [1, 2, 3, 4, 5]
+    assert texts(graph, steps[1]['next']) == ['Yes', 'No']
+
+def test_steps_include_unreached_loops_and_skip_isolated_nodes():
+    results = [item(0, 0, 'A'), item(0, 100, 'B'), item(400, 0, 'Loop 1'), item(400, 100, 'Loop 2'),
+               item(800, 0, 'Isolated')]
+    graph = FlowGraph(results, [edge(0, 1), edge(2, 3), edge(3, 2)])
+    assert [s['text'] for s in graph.steps()] == ['A', 'B', 'Loop 1', 'Loop 2']
+    start = next(nid for nid, node in graph.nodes.items() if node['text'] == 'Loop 2')
+    assert [s['text'] for s in graph.steps([start, 'unknown'])] == ['Loop 2', 'Loop 1']
+
+def test_exports():
+    graph = FlowGraph([item(0, 0, 'Say "hi"', 'oval', id='s'), item(0, 100, 'Ok?', 'diamond', id='q-1')],
+                      [edge(0, 1)])
+    assert to_mermaid(graph).splitlines() == [
+        'flowchart TD', '    s(["Say #quot;hi#quot;"])', '    q_1{"Ok?"}', '    s --> q_1']
+    assert '"s" [label="Say \\"hi\\"", shape=ellipse];' in to_dot(graph)
+    lines = [json.loads(line) for line in to_ndjson(graph, page=1).splitlines()]
+    assert [(line['type'], line['page']) for line in lines] == [('node', 1), ('node', 1), ('edge', 1)]
+    assert to_columnar(graph)['nodes']['id'] == ['s', 'q-1']
+    assert export_graph(graph, 'json')[0]['starts'] == ['s']
+    with pytest.raises(ValueError):
+        export_graph(graph, 'xml')
+
+def test_empty_graph():
+    graph = FlowGraph([], [])
+    assert graph.to_dict() == {'nodes': [], 'edges': [], 'starts': [], 'steps': []}
+    assert to_ndjson(graph) == ''
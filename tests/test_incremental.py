@@ -0,0 +1,61 @@
+from src.incremental import diff_boxes
+
+def box(x1, y1, x2, y2, label='box'):
+    return {'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2, 'label': label}
+
+def run(*items):
+    return [{'box': box(*coords), 'ocr_text': text} for coords, text in items]
+
+def test_unchanged_boxes_keep_their_text():
+    previous = run(((10, 10, 100, 50), 'Start'), ((10, 200, 100, 250), 'End'))
+    reused, changed = diff_boxes(previous, [item['box'] for item in previous])
+    assert reused == {0: 'Start', 1: 'End'}
+    assert changed == []
+
+def test_small_moves_within_tolerance_are_reused():
+    previous = run(((10, 10, 100, 50), 'Start'))
+    reused, changed = diff_boxes(previous, [box(12, 8, 103, 51)], tolerance=3)
+    assert reused == {0: 'Start'}
+    assert changed == []
+
+def test_moves_beyond_tolerance_are_re_ocrd():
+    previous = run(((10, 10, 100, 50), 'Start'))
+    reused, changed = diff_boxes(previous, [box(10, 10, 110, 50)], tolerance=3)
+    assert reused == {}
+    assert changed == [0]
+
+def test_new_boxes_and_reordering():
+    previous = run(((10, 10, 100, 50), 'Start'), ((10, 200, 100, 250), 'End'))
+    boxes = [box(10, 200, 100, 250), box(300, 300, 400, 350), box(10, 10, 100, 50)]
+    reused, changed = diff_boxes(previous, boxes)
+    assert reused == {0: 'End', 2: 'Start'}
+    assert changed == [1]
+
+def test_each_previous_box_is_reused_once():
+    previous = run(((10, 10, 100, 50), 'Start'))
+    reused, changed = diff_boxes(previous, [box(10, 10, 100, 50), box(11, 10, 100, 50)])
+    assert reused == {0: 'Start'}
+    assert changed == [1]
+
+def test_closest_previous_box_wins():
+    previous = run(((10, 10, 100, 50), 'far'), ((12, 10, 100, 50), 'near'))
+    reused, _ = diff_boxes(previous, [box(12, 10, 100, 50)], tolerance=3)
+    assert reused == {0: 'near'}
+
+def test_relabelled_boxes_are_re_ocrd():
+    previous = run(((10, 10, 100, 50), 'Start'), ((10, 200, 100, 250), ''))
+    previous[1]['box']['label'] = 'arrow'
+    boxes = [box(10, 10, 100, 50, 'arrow'), box(10, 200, 100, 250, 'box')]
+    reused, changed = diff_boxes(previous, boxes)
+    assert reused == {}
+    assert changed == [0, 1]
+
+def test_label_case_is_ignored():
+    previous = run(((10, 10, 100, 50), 'Start'))
+    reused, _ = diff_boxes(previous, [box(10, 10, 100, 50, 'BOX')])
+    assert reused == {0: 'Start'}
+
+def test_no_previous_run():
+    reused, changed = diff_boxes([], [box(0, 0, 10, 10)])
+    assert reused == {}
+    assert changed == [0]
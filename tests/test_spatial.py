@@ -0,0 +1,54 @@
+from src.spatial import GridIndex, rect_distance
+
+def test_query_rect_spans_cells():
+    index = GridIndex(cell_size=10)
+    index.insert('wide', 0, 0, 95, 5)
+    index.insert('far', 200, 200, 210, 210)
+    assert index.query_rect(80, 0, 90, 10) == {'wide'}
+    assert index.query_rect(100, 100, 150, 150) == set()
+
+def test_query_point_radius():
+    index = GridIndex(cell_size=10)
+    index.insert('a', 20, 20, 30, 30)
+    assert index.query_point(25, 25) == {'a'}
+    assert index.query_point(35, 25) == set()
+    assert index.query_point(35, 25, radius=5) == {'a'}
+
+def test_reversed_corners_are_normalised():
+    index = GridIndex(cell_size=10)
+    index.insert('a', 30, 30, 20, 20)
+    assert index.rects['a'] == (20, 20, 30, 30)
+    assert index.query_point(25, 25) == {'a'}
+
+def test_reinsert_moves_item():
+    index = GridIndex(cell_size=10)
+    index.insert('a', 0, 0, 5, 5)
+    index.insert('a', 100, 100, 105, 105)
+    assert len(index) == 1
+    assert index.query_point(2, 2) == set()
+    assert index.query_point(102, 102) == {'a'}
+
+def test_remove_drops_empty_cells():
+    index = GridIndex(cell_size=10)
+    index.insert('a', 0, 0, 25, 25)
+    index.remove('a')
+    index.remove('missing')
+    assert 'a' not in index
+    assert not index.cells
+
+def test_negative_coordinates():
+    index = GridIndex(cell_size=10)
+    index.insert('a', -25, -25, -15, -15)
+    assert index.query_point(-20, -20) == {'a'}
+
+def test_nearest():
+    index = GridIndex(cell_size=10)
+    index.insert('left', 0, 0, 10, 10)
+    index.insert('right', 30, 0, 40, 10)
+    assert index.nearest(12, 5, 20) == 'left'
+    assert index.nearest(27, 5, 20) == 'right'
+    assert index.nearest(20, 100, 20) is None
+
+def test_rect_distance():
+    assert rect_distance(5, 5, (0, 0, 10, 10)) == 0
+    assert rect_distance(13, 14, (0, 0, 10, 10)) == 5
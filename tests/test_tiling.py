@@ -0,0 +1,70 @@
+from src.tiling import cut_by_tile, merge_boxes, place_boxes, plan_tiles, tile_starts
+
+def box(x1, y1, x2, y2, label='box'):
+    return {'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2, 'label': label}
+
+def test_tile_starts():
+    assert tile_starts(300, 400, 100) == [0]
+    assert tile_starts(400, 400, 100) == [0]
+    assert tile_starts(1000, 400, 100) == [0, 300, 600]
+    # last tile flush with the edge even when the step does not divide evenly
+    assert tile_starts(1050, 400, 100) == [0, 300, 600, 650]
+
+def test_plan_tiles_cover_the_page_with_overlap():
+    width, height, tile, overlap = 2500, 1100, 800, 200
+    tiles = plan_tiles(width, height, tile, overlap)
+    for x1, y1, x2, y2 in tiles:
+        assert 0 <= x1 < x2 <= width and 0 <= y1 < y2 <= height
+        assert x2 - x1 == tile and y2 - y1 == tile
+    xs = sorted({(x1, x2) for x1, _, x2, _ in tiles})
+    ys = sorted({(y1, y2) for _, y1, _, y2 in tiles})
+    assert xs[0][0] == 0 and xs[-1][1] == width
+    assert ys[0][0] == 0 and ys[-1][1] == height
+    for (_, end), (start, _) in zip(xs, xs[1:]):
+        assert end - start >= overlap
+    assert len(tiles) == len(xs) * len(ys)
+
+def test_plan_tiles_small_page_is_one_tile():
+    assert plan_tiles(500, 300, 800, 200) == [(0, 0, 500, 300)]
+
+def test_merge_keeps_the_larger_duplicate():
+    small, large = box(0, 0, 100, 100), box(0, 0, 100, 110)
+    assert merge_boxes([small, large], 0.5) == [large]
+
+def test_merge_priority_beats_size():
+    coarse, tile = box(0, 0, 100, 110), box(0, 0, 100, 100)
+    assert merge_boxes([coarse, tile], 0.5, priority=[0, 1]) == [tile]
+
+def test_merge_is_label_agnostic():
+    merged = merge_boxes([box(0, 0, 100, 100, 'rectangle'), box(2, 2, 100, 100, 'diamond')], 0.5)
+    assert [b['label'] for b in merged] == ['rectangle']
+
+def test_merge_keeps_separate_boxes_in_input_order():
+    boxes = [box(500, 0, 600, 100), box(0, 0, 100, 100), box(60, 0, 160, 100)]
+    # IoU of the last two is 40 / 160 = 0.25
+    assert merge_boxes(boxes, 0.5) == boxes
+
+def test_merge_degenerate_inputs():
+    assert merge_boxes([]) == []
+    one = [box(0, 0, 10, 10)]
+    assert merge_boxes(one) == one and merge_boxes(one) is not one
+    # zero-area boxes do not divide by zero
+    assert len(merge_boxes([box(5, 5, 5, 5), box(5, 5, 5, 5)], 0.5)) == 2
+
+def test_place_boxes_offsets_scales_and_clamps():
+    placed = place_boxes([box(10, 20, 30, 40)], dx=100, dy=200)
+    assert placed[0] == box(110, 220, 130, 240)
+    scaled = place_boxes([box(10, 20, 30, 40)], factor=2.5, width=70, height=90)
+    assert (scaled[0]['x1'], scaled[0]['y1'], scaled[0]['x2'], scaled[0]['y2']) == (25, 50, 70, 90)
+    assert scaled[0]['label'] == 'box'
+
+def test_cut_by_tile_inner_edges_only():
+    width, height = 1000, 300
+    middle, last = (300, 0, 700, 300), (600, 0, 1000, 300)
+    assert cut_by_tile(box(301, 50, 400, 100), middle, width, height)
+    assert cut_by_tile(box(500, 50, 699, 100), middle, width, height)
+    assert not cut_by_tile(box(350, 50, 600, 100), middle, width, height)
+    # page edges are not cuts
+    assert not cut_by_tile(box(350, 0, 600, 300), middle, width, height)
+    assert not cut_by_tile(box(700, 50, 1000, 100), last, width, height)
+    assert cut_by_tile(box(601, 50, 800, 100), last, width, height)